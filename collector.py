@@ -0,0 +1,93 @@
+from typing import IO, Optional
+import argparse
+import os
+import sys
+import threading
+import time
+
+# reported with the cycle metrics; gql is only imported once the first query is sent
+import_started_at = time.perf_counter()
+from data_getter import COLLECTION_SOURCES, collect_all_sources, collector_metrics, data_gathering_loop, prepare_data_gathering
+from views import publish_views
+collector_metrics["import_seconds"] = round(time.perf_counter() - import_started_at, 3)
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+# held for the lifetime of the collecting process, so at most one collector runs per host
+COLLECTOR_LOCK_PATH = "jsons/.collector.lock"
+
+collector_lock_file: Optional[IO] = None
+collector_thread: Optional[threading.Thread] = None
+collector_thread_lock = threading.Lock()
+
+
+def acquire_collector_lock(path: str = COLLECTOR_LOCK_PATH) -> Optional[IO]:
+    lock_file = open(path, mode="a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        return None
+
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    return lock_file
+
+
+def start_collector_thread() -> bool:
+    # safe to call on every Streamlit rerun: starts the loop only if no collector runs in this
+    # process or any other process on the host
+    global collector_lock_file, collector_thread
+
+    with collector_thread_lock:
+        if collector_thread is not None and collector_thread.is_alive():
+            return True
+
+        if collector_lock_file is None:
+            collector_lock_file = acquire_collector_lock()
+            if collector_lock_file is None:
+                return False
+
+        collector_thread = threading.Thread(
+            target=data_gathering_loop,
+            kwargs={"post_collection": publish_views},
+            name="collector",
+            daemon=True,
+        )
+        collector_thread.start()
+        return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Collect TraderJoe staking data from the subgraphs into jsons/")
+    parser.add_argument("--once", action="store_true", help="run a single collection cycle and exit")
+    parser.add_argument("--sequential", action="store_true", help="collect the sources one after another")
+    args = parser.parse_args()
+
+    global collector_lock_file
+    collector_lock_file = acquire_collector_lock()
+    if collector_lock_file is None:
+        print(f"another collector holds {COLLECTOR_LOCK_PATH}, exiting")
+        sys.exit(1)
+
+    if args.once:
+        prepare_data_gathering()
+        collect_all_sources(COLLECTION_SOURCES, is_concurrent=not args.sequential)
+        publish_views()
+    else:
+        data_gathering_loop(is_concurrent=not args.sequential, post_collection=publish_views)
+
+
+if __name__ == "__main__":
+    main()
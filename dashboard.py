@@ -1,170 +1,76 @@
-from typing import List, Literal
-from decimal import Decimal
+from typing import Dict, List, Tuple
+import os
 import altair as alt
 import itables
 import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
-from data_getter import (
-    to_sjoe_users_df,
-    to_vejoe_users_df,
-    to_rjoe_users_df,
-    to_vejoe_day_snapshots_df,
-    to_sjoe_day_snapshots_df,
-    to_rjoe_day_snapshots_df,
-    to_vejoe_wars_df,
-    data_gathering_loop,
-    vejoe_wars,
-)
-from utils import load_json
-
-
-import threading
-def my_threaded_func():
-    data_gathering_loop()
-
-thread = threading.Thread(target=my_threaded_func)
-thread.daemon = True
-thread.start()
-
-
-@st.cache(ttl=180)
-def get_vejoe_wars() -> pd.DataFrame:
-    vejoe_wars_raw = load_json("jsons/vejoe_wars.json")
-    df = to_vejoe_wars_df(vejoe_wars_raw)
-    return df
-
-
-@st.cache(ttl=180)
-def get_sjoe_users_df(is_minimal: bool = True) -> pd.DataFrame:
-    # sjoe_users = sjoe_get_all_users()
-    sjoe_users = load_json("jsons/sjoe_get_all_users.json")
-
-    df_sjoe_users = to_sjoe_users_df(sjoe_users)
-    if is_minimal:
-        df_sjoe_users.drop(columns=["sJOE.total_JOE_deposit_fee", "sJOE.deposit_count", "sJOE.withdraw_count", "sJOE.claim_count"], inplace=True)
-    return df_sjoe_users
-
-
-@st.cache(ttl=180)
-def get_vejoe_users_df(is_minimal: bool = True) -> pd.DataFrame:
-    # vejoe_users = vejoe_get_all_users()
-    vejoe_users = load_json("jsons/vejoe_get_all_users.json")
-
-    df_vejoe_users = to_vejoe_users_df(vejoe_users)
-    if is_minimal:
-        df_vejoe_users.drop(columns=["veJOE.deposit_count", "veJOE.withdraw_count", "veJOE.claim_count"], inplace=True)
-    return df_vejoe_users
-
-
-@st.cache(ttl=180)
-def get_rjoe_users_df(is_minimal: bool = True) -> pd.DataFrame:
-    # rjoe_users = rjoe_get_all_users()
-    rjoe_users = load_json("jsons/rjoe_get_all_users.json")
-
-    df_rjoe_users = to_rjoe_users_df(rjoe_users)
-    if is_minimal:
-        df_rjoe_users.drop(columns=["rJOE.deposit_count", "rJOE.withdraw_count"], inplace=True)
-        df_rjoe_users.drop(columns=["rJOE.rJOE_balance"], inplace=True)
-    return df_rjoe_users
-
-
-@st.cache(ttl=180)
-def get_vejoe_day_snapshots_df(is_minimal: bool = True) -> pd.DataFrame:
-    # vejoe_day_snapshots = vejoe_get_all_day_snapshots()
-    vejoe_day_snapshots = load_json("jsons/vejoe_get_all_day_snapshots.json")
-
-    df_vejoe_day_snapshots = to_vejoe_day_snapshots_df(vejoe_day_snapshots)
-    if is_minimal:
-        df_vejoe_day_snapshots.drop(columns=["veJOE.deposit_count", "veJOE.withdraw_count", "veJOE.claim_count"], inplace=True)
-    return df_vejoe_day_snapshots
-
-
-@st.cache(ttl=180)
-def get_sjoe_day_snapshots_df(is_minimal: bool = True) -> pd.DataFrame:
-    # sjoe_day_snapshots = sjoe_get_all_day_snapshots()
-    sjoe_day_snapshots = load_json("jsons/sjoe_get_all_day_snapshots.json")
-
-    df_sjoe_day_snapshots = to_sjoe_day_snapshots_df(sjoe_day_snapshots)
-    if is_minimal:
-        df_sjoe_day_snapshots.drop(columns=["sJOE.deposit_count", "sJOE.withdraw_count", "sJOE.claim_count", "sJOE.emergency_withdraw_count"], inplace=True)
-    return df_sjoe_day_snapshots
-
-
-@st.cache(ttl=180)
-def get_rjoe_day_snapshots_df(is_minimal: bool = True) -> pd.DataFrame:
-    # rjoe_day_snapshots = rjoe_get_all_day_snapshots()
-    rjoe_day_snapshots = load_json("jsons/rjoe_get_all_day_snapshots.json")
-
-    df_rjoe_day_snapshots = to_rjoe_day_snapshots_df(rjoe_day_snapshots)
-    if is_minimal:
-        df_rjoe_day_snapshots.drop(columns=["rJOE.deposit_count", "rJOE.withdraw_count"], inplace=True)
-        df_rjoe_day_snapshots.drop(columns=["rJOE.total_rJOE_reward", "rJOE.change_rJOE_reward"], inplace=True)
-    return df_rjoe_day_snapshots
-
-
-@st.cache
-def join_multiple_dfs(dfs: List[pd.DataFrame], how: Literal["left", "right", "inner", "outer",]) -> pd.DataFrame:
-    assert len(dfs) >= 2, "pass at least 2 DataFrames"
-    df = dfs.pop(0).copy()
-    while True:
-        df_other = dfs.pop(0).copy()
-        df = df.join(df_other, how=how)
-        if len(dfs) == 0:
-            break
-    return df
+from collector import start_collector_thread
+from data_getter import to_vejoe_wars_df
+from storage import VEJOE_WARS_DIR, load_frame, load_generations, load_vejoe_wars
+from utils import stale_while_revalidate
+from views import downsample_min_max, format_datatable, get_num_pages, get_view_name, is_views_ready, paginate, prepare_views, query_datatable
+
+
+# the first run of the process builds the views from the committed JSON, so the page renders
+# before the collector (or its first backfill) has published anything
+prepare_views()
+
+# COLLECTOR_MODE=external when `python collector.py` runs as its own service
+if os.environ.get("COLLECTOR_MODE", "thread") == "thread":
+    start_collector_thread()
+
+
+# Every cached helper below is keyed by the generation ids the collector publishes, never by
+# DataFrame arguments. When the collector publishes new data, reruns keep getting the previous
+# value while it is rebuilt in the background, so no page load waits on a rebuild unless the
+# served value is more than MAX_STALENESS_SECONDS out of date. Outputs are shared between
+# reruns and must not be mutated. The tables themselves are precomputed by the collector
+# (see views.py), so a rebuild only memory-maps a file.
+MAX_STALENESS_SECONDS = 3 * 60
+
+# charts are downsampled to at most one point per two pixels of this width per series (each
+# bucket keeps up to 4 points), which keeps the payload bounded however long the history gets
+# and every chart under the 5000 rows Altair accepts by default
+CHART_WIDTH_PIXELS = 1200
+
+
+@stale_while_revalidate(max_staleness=MAX_STALENESS_SECONDS)
+def get_vejoe_wars_chart_data(generation: str, width: int) -> Dict[str, pd.DataFrame]:
+    df = to_vejoe_wars_df(load_vejoe_wars(VEJOE_WARS_DIR))
+    return {
+        y: downsample_min_max(df[["block_number", "platform", y]], "block_number", y, num_buckets=width // 8, group="platform")
+        for y in ["total_stake", "total_reward"]
+    }
 
 
-@st.cache
-def make_datatable(
-    dfs: List[pd.DataFrame],
-    choices: List[bool],
+@stale_while_revalidate(max_staleness=MAX_STALENESS_SECONDS)
+def get_users_datatable(
+    generation: str,
+    choices: Tuple[bool, bool, bool],
 ) -> pd.DataFrame:
-    assert len(dfs) == len(choices), "`dfs` and `choices` must have the same length"
-    dfs_c = [
-        df
-        for df, choice in zip(dfs, choices)
-        if choice
-    ]
-
-    if len(dfs_c) == 0:
+    if not any(choices):
         return pd.DataFrame()
-    elif len(dfs_c) == 1:
-        df_dashboard = dfs_c[0]
-    else:
-        df_dashboard = join_multiple_dfs(dfs_c, how="outer")
-
-    df_dashboard = df_dashboard.applymap(lambda x: f"{x:.3f}".rstrip("0").rstrip("."), na_action="ignore")
-    return df_dashboard
-
-
-@st.cache
-def make_users_datatable(
-    dfs: List[pd.DataFrame],
-    choices: List[bool],
-) -> pd.DataFrame:
-    datatable = make_datatable(dfs, choices).copy()
-    datatable.fillna(Decimal("0"), inplace=True)
+    datatable = load_frame(get_view_name("users", choices))
     datatable.columns = pd.MultiIndex.from_tuples([c.split(".", 1) for c in datatable.columns], names=["pool", "stats"])
     return datatable
 
 
-@st.cache
-def make_day_snapshots_datatable(
-    dfs: List[pd.DataFrame],
-    choices: List[bool],
-) -> pd.DataFrame:
-    datatable = make_datatable(dfs, choices).copy()
-    datatable.reset_index(inplace=True)
-    datatable = datatable.applymap(lambda x: float(x) if isinstance(x, Decimal) else x)
+def load_day_snapshots_datatable(choices: Tuple[bool, bool, bool]) -> pd.DataFrame:
+    if not any(choices):
+        return pd.DataFrame(columns=["date"])
+    datatable = load_frame(get_view_name("day_snapshots", choices))
     return datatable
 
 
-@st.cache
+@stale_while_revalidate(max_staleness=MAX_STALENESS_SECONDS)
 def query_day_snapshots_datatable(
-    day_snapshots_datatable: pd.DataFrame,
+    generation: str,
+    choices: Tuple[bool, bool, bool],
     col_name: str,
+    width: int,
 ) -> pd.DataFrame:
+    day_snapshots_datatable = load_day_snapshots_datatable(choices)
     cols = [
         c
         for c in day_snapshots_datatable.columns
@@ -178,7 +84,10 @@ def query_day_snapshots_datatable(
         df["pool"] = col.split(".", 1)[0]
         dfs.append(df)
 
+    if len(dfs) == 0:
+        return pd.DataFrame(columns=["date", col_name, "pool"])
     df = pd.concat(dfs)
+    df = downsample_min_max(df, "date", col_name, num_buckets=width // 8, group="pool")
     return df
 
 
@@ -204,22 +113,55 @@ def make_datatable_heading(
         return f"{label} Pools"
 
 
-@st.cache(ttl=180)
-def make_vejoe_wars_datatable() -> pd.DataFrame:
-    from_address_to_platform = {
-        "0xe7462905B79370389e8180E300F58f63D35B725F".lower(): "YieldYak",
-        "0x1F2A8034f444dc55F963fb5925A9b6eb744EeE2c".lower(): "Beefy",
-        "0xF30E775240D4137daEa097109FEA882C406D61cc".lower(): "NorthPole",
-        "0x0E25c07748f727D6CCcD7D2711fD7bD13d13422d".lower(): "Vector",
-    }
-
-    datatable = vejoe_wars()
-    datatable["address"] = datatable["address"].map(lambda x: from_address_to_platform.get(x, x))
-    datatable = datatable.applymap(lambda x: f"{x:.3f}".rstrip("0").rstrip(".") if isinstance(x, Decimal) else x, na_action="ignore")
-    datatable.set_index("address", inplace=True)
+@stale_while_revalidate(max_staleness=MAX_STALENESS_SECONDS)
+def get_vejoe_wars_datatable(generation: str) -> pd.DataFrame:
+    datatable = load_frame("vejoe_wars_view")
     return datatable
 
 
+def show_datatable(datatable: pd.DataFrame, key: str, classes: List[str]) -> None:
+    # search, sort and paging happen here on the server, so only the visible page of rows is
+    # serialized into the HTML sent to the browser
+    columns = [None] + list(datatable.columns)
+    col_search, col_sort, col_order, col_page_size, col_page = st.columns([3, 3, 2, 2, 2])
+    search = col_search.text_input("Search", key=f"{key}_search")
+    sort_by = col_sort.selectbox(
+        "Sort by",
+        columns,
+        format_func=lambda c: datatable.index.name if c is None else " ".join(c) if isinstance(c, tuple) else c,
+        key=f"{key}_sort_by",
+    )
+    ascending = col_order.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Ascending"
+    page_size = col_page_size.selectbox("Rows per page", [10, 25, 50, 100], index=1, key=f"{key}_page_size")
+    page = col_page.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page")
+
+    result = query_datatable(datatable, sort_by=sort_by, ascending=ascending, search=search)
+    num_pages = get_num_pages(len(result), page_size)
+    page = min(int(page), num_pages)
+    page_datatable = format_datatable(paginate(result, page, page_size))
+    first_row = (page - 1) * page_size
+    st.write(f"Page {page} of {num_pages}, rows {first_row + min(1, len(page_datatable))}-{first_row + len(page_datatable)} of {len(result)}")
+
+    components.html(
+        itables.javascript._datatables_repr_(
+            page_datatable,
+            maxBytes=0,
+            paging=False,
+            searching=False,
+            ordering=False,
+            info=False,
+            classes=classes,
+            columnDefs=[
+                # {"className": "dt-head-center", "targets": "_all"},
+                {"className": "dt-body-right", "targets": list(range(1, len(page_datatable.columns)+1))},
+                {"className": "dt-body-left", "targets": 0},
+            ],
+        ),
+        height=min(600, 120 + 35 * len(page_datatable)),
+        scrolling=True,
+    )
+
+
 st.set_page_config(layout="wide")
 
 st.title("TraderJoe Analytics")
@@ -248,9 +190,15 @@ with st.sidebar:
     is_rjoe_pool = st.checkbox("rJOE Pool", value=True)
 
 
-df_sjoe_users = get_sjoe_users_df(is_minimal=True)
-df_vejoe_users = get_vejoe_users_df(is_minimal=True)
-df_rjoe_users = get_rjoe_users_df(is_minimal=True)
+if not is_views_ready():
+    st.info("The data is not ready yet, the collector is still building it. Reload the page in a minute.")
+    st.stop()
+
+generations = load_generations()
+pool_choices = (is_vejoe_pool, is_sjoe_pool, is_rjoe_pool)
+# the view inputs generation changes exactly when the collector rebuilds the views
+users_generation = generations.get("users_view_inputs", "")
+day_snapshots_generation = generations.get("day_snapshots_view_inputs", "")
 
 
 st.header("JOE Wars")
@@ -311,30 +259,19 @@ st.subheader("Wallets")
 
 # st.write("[YieldYak](https://yieldyak.com/")
 
-vejoe_wars_datatable = make_vejoe_wars_datatable()
+vejoe_wars_datatable = get_vejoe_wars_datatable(generations.get("vejoe_wars_view", ""))
 
 
-components.html(
-    itables.javascript._datatables_repr_(
-        vejoe_wars_datatable,
-        maxBytes=0,
-        classes=["cell-border", "hover", "order-column", "stripe"],
-        columnDefs=[
-            # {"className": "dt-head-center", "targets": "_all"},
-            {"className": "dt-body-right", "targets": list(range(1, len(vejoe_wars_datatable.columns)+1))},
-            {"className": "dt-body-left", "targets": 0},
-        ],
-    ),
-    height=600,
-    scrolling=True,
-)
+show_datatable(vejoe_wars_datatable, key="vejoe_wars", classes=["cell-border", "hover", "order-column", "stripe"])
 
 
-df_vejoe_wars = get_vejoe_wars()
+vejoe_wars_chart_data = get_vejoe_wars_chart_data(generations.get("vejoe_wars", ""), width=CHART_WIDTH_PIXELS)
+df_vejoe_wars_stake = vejoe_wars_chart_data["total_stake"]
+df_vejoe_wars_reward = vejoe_wars_chart_data["total_reward"]
 
 st.subheader("Platform Stats by Block Number")
 
-all_stake = alt.Chart(df_vejoe_wars).mark_line().encode(
+all_stake = alt.Chart(df_vejoe_wars_stake).mark_line().encode(
     x=alt.X("block_number:Q", title="Block Number"),
     y=alt.Y("total_stake:Q", title="Staked JOE"),
     color="platform:N",
@@ -343,7 +280,7 @@ all_stake = alt.Chart(df_vejoe_wars).mark_line().encode(
 )
 st.altair_chart(all_stake, use_container_width=True)
 
-platforms_stake = alt.Chart(df_vejoe_wars[df_vejoe_wars["platform"] != "Pool"]).mark_line().encode(
+platforms_stake = alt.Chart(df_vejoe_wars_stake[df_vejoe_wars_stake["platform"] != "Pool"]).mark_line().encode(
     x=alt.X("block_number:Q", title="Block Number"),
     y=alt.Y("total_stake:Q", title="Staked JOE"),
     color="platform:N",
@@ -353,7 +290,7 @@ platforms_stake = alt.Chart(df_vejoe_wars[df_vejoe_wars["platform"] != "Pool"]).
 st.altair_chart(platforms_stake, use_container_width=True)
 
 
-all_reward = alt.Chart(df_vejoe_wars).mark_line().encode(
+all_reward = alt.Chart(df_vejoe_wars_reward).mark_line().encode(
     x=alt.X("block_number:Q", title="Block Number"),
     y=alt.Y("total_reward:Q", title="Accrued veJOE"),
     color="platform:N",
@@ -362,7 +299,7 @@ all_reward = alt.Chart(df_vejoe_wars).mark_line().encode(
 )
 st.altair_chart(all_reward, use_container_width=True)
 
-platforms_reward = alt.Chart(df_vejoe_wars[df_vejoe_wars["platform"] != "Pool"]).mark_line().encode(
+platforms_reward = alt.Chart(df_vejoe_wars_reward[df_vejoe_wars_reward["platform"] != "Pool"]).mark_line().encode(
     x=alt.X("block_number:Q", title="Block Number"),
     y=alt.Y("total_reward:Q", title="Accrued veJOE"),
     color="platform:N",
@@ -388,46 +325,17 @@ users_datatable_heading = make_datatable_heading(
         is_rjoe_pool,
     ]
 )
-users_datatable = make_users_datatable(
-    dfs=[
-        df_vejoe_users,
-        df_sjoe_users,
-        df_rjoe_users,
-    ],
-    choices=[
-        is_vejoe_pool,
-        is_sjoe_pool,
-        is_rjoe_pool,
-    ]
-)
+users_datatable = get_users_datatable(users_generation, pool_choices)
 
 
 st.write(f"Showing: {users_datatable_heading}")
 
-components.html(
-    itables.javascript._datatables_repr_(
-        users_datatable,
-        maxBytes=0,
-        classes=["cell-border", "hover", "nowrap", "order-column", "stripe"],
-        columnDefs=[
-            # {"className": "dt-head-center", "targets": "_all"},
-            {"className": "dt-body-right", "targets": list(range(1, len(users_datatable.columns)+1))},
-            {"className": "dt-body-left", "targets": 0},
-        ],
-    ),
-    height=600,
-    scrolling=True,
-)
+show_datatable(users_datatable, key="users", classes=["cell-border", "hover", "nowrap", "order-column", "stripe"])
 
 
 st.subheader("Daily Pool Snapshots")
 
 
-df_sjoe_day_snapshots = get_sjoe_day_snapshots_df(is_minimal=True)
-df_vejoe_day_snapshots = get_vejoe_day_snapshots_df(is_minimal=True)
-df_rjoe_day_snapshots = get_rjoe_day_snapshots_df(is_minimal=True)
-
-
 day_snapshots_datatable_heading = make_datatable_heading(
     labels=[
         "veJOE",
@@ -440,20 +348,6 @@ day_snapshots_datatable_heading = make_datatable_heading(
         is_rjoe_pool,
     ]
 )
-day_snapshots_datatable = make_day_snapshots_datatable(
-    dfs=[
-        df_vejoe_day_snapshots,
-        df_sjoe_day_snapshots,
-        df_rjoe_day_snapshots,
-    ],
-    choices=[
-        is_vejoe_pool,
-        is_sjoe_pool,
-        is_rjoe_pool,
-    ]
-)
-
-
 st.write(f"Showing: {day_snapshots_datatable_heading}")
 st.write("Total User Count = Number of distinct addresses which deposited JOE to the pool.")
 st.write("Active User Count = Number of distinct addresses which currently has positive JOE stake in the pool.")
@@ -476,9 +370,9 @@ def make_altair_chart(df: pd.DataFrame, yaxis_col_name: str, yaxis_title: str) -
     return chart
 
 
-df_day_snapshots_total_joe_stake = query_day_snapshots_datatable(day_snapshots_datatable, col_name="total_JOE_stake")
-df_day_snapshots_total_user_count = query_day_snapshots_datatable(day_snapshots_datatable, col_name="total_user_count")
-df_day_snapshots_active_user_count = query_day_snapshots_datatable(day_snapshots_datatable, col_name="active_user_count")
+df_day_snapshots_total_joe_stake = query_day_snapshots_datatable(day_snapshots_generation, pool_choices, col_name="total_JOE_stake", width=CHART_WIDTH_PIXELS)
+df_day_snapshots_total_user_count = query_day_snapshots_datatable(day_snapshots_generation, pool_choices, col_name="total_user_count", width=CHART_WIDTH_PIXELS)
+df_day_snapshots_active_user_count = query_day_snapshots_datatable(day_snapshots_generation, pool_choices, col_name="active_user_count", width=CHART_WIDTH_PIXELS)
 
 
 st.altair_chart(make_altair_chart(df_day_snapshots_total_joe_stake, "total_JOE_stake", yaxis_title="Staked JOE"), use_container_width=True)
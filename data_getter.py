@@ -1,12 +1,23 @@
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from decimal import Decimal
+from functools import lru_cache, partial
+import json
 import os
+import random
+import shutil
+import threading
 import time
-from gql import Client, gql
-from gql.transport.requests import RequestsHTTPTransport
+import numpy as np
 import pandas as pd
+from storage import VEJOE_WARS_DIR, append_vejoe_wars, dump_frame, get_frame_path, load_last_vejoe_wars, migrate_vejoe_wars_json, recover_vejoe_wars, replace_vejoe_wars
 from utils import dump_json, load_json
 
+if TYPE_CHECKING:
+    from gql import Client
+    from graphql import DocumentNode
+
 
 SJOE_URL = "https://api.thegraph.com/subgraphs/name/0xsloth/sjoe-stake"
 VEJOE_URL = "https://api.thegraph.com/subgraphs/name/0xsloth/vejoe-stake"
@@ -19,970 +30,1566 @@ RJOE_DECIMALS = Decimal("18")
 USDC_DECIMALS = Decimal("6")
 
 
-# Select your transport with a defined url endpoint
-sjoe_transport = RequestsHTTPTransport(url=SJOE_URL)
-vejoe_transport = RequestsHTTPTransport(url=VEJOE_URL)
-vejoe_boosted_pools_transport = RequestsHTTPTransport(url=VEJOE_BOOSTED_POOLS_URL)
-vejoe_boosted_pools_transport.connect()
-rjoe_transport = RequestsHTTPTransport(url=RJOE_URL)
-
-# Create a GraphQL client using the defined transport
-sjoe_client = Client(transport=sjoe_transport, fetch_schema_from_transport=True)
-vejoe_client = Client(transport=vejoe_transport, fetch_schema_from_transport=True)
-rjoe_client = Client(transport=rjoe_transport, fetch_schema_from_transport=True)
-
-
-def vejoe_wars() -> pd.DataFrame:
-    joe_per_sec = Decimal("1833719582850521436") / Decimal("10") ** JOE_DECIMALS
-    num_secs_in_day = Decimal(60 * 60 * 24)
-    vejoe_users = load_json("jsons/vejoe_get_all_users.json")
-    vejoe_users_boosted_pools = load_json("jsons/vejoe_get_all_users_boosted_pool_positions.json")
-    df_vejoe_users_boosted_pools = to_vejoe_users_boosted_pools_df(vejoe_users_boosted_pools)
-    df_vejoe_users = to_vejoe_users_df(vejoe_users)
-    df = df_vejoe_users_boosted_pools.join(df_vejoe_users, how="outer")
-    df["user_factor"] = (df["veJOE.veJOE_balance"] * df["user_lp_amount"]).fillna(Decimal("0")) ** (Decimal("0.5"))
-    df["total_factor"] = df["user_factor"].groupby(df["pid"]).transform("sum")
-    df["user_factor_ratio"] = df["user_factor"] / df["total_factor"]
-    df["user_lp_ratio"] = df["user_lp_amount"] / df["total_lp_amount"]
-    df["total_alloc_point"] = df.drop_duplicates(subset=["pid"])["alloc_point"].sum()
-    df["boost_joe_per_sec"] = joe_per_sec * (df["alloc_point"] / df["total_alloc_point"]) * (df["veJOE_share_bp"] / Decimal("10000")) * df["user_factor_ratio"]
-    df["base_joe_per_sec"] = joe_per_sec * (df["alloc_point"] / df["total_alloc_point"]) * ((Decimal("10000") - df["veJOE_share_bp"]) / Decimal("10000")) * df["user_lp_ratio"]
-    df["pool_joe_per_sec"] = (df["base_joe_per_sec"] + df["boost_joe_per_sec"])
-    df["user_joe_per_sec"] = df["pool_joe_per_sec"].groupby(df.index).transform("sum")
-    df["user_joe_per_day"] = df["user_joe_per_sec"] * num_secs_in_day
-    df.reset_index(inplace=True)
-    df.drop_duplicates("address", inplace=True)
-    df = df[["address", "veJOE.total_JOE_stake", "veJOE.veJOE_balance", "user_joe_per_day"]].fillna(Decimal("0"))
-    df.rename(columns={"veJOE.total_JOE_stake": "JOE Stake", "veJOE.veJOE_balance": "veJOE Balance", "user_joe_per_day": "Daily JOE Reward"}, inplace=True)
-    df["JOE Stake Rank"] = df["JOE Stake"].rank(method ="min", ascending=False)
-    df["veJOE Balance Rank"] = df["veJOE Balance"].rank(method ="min", ascending=False)
-    df["Daily JOE Reward Rank"] = df["Daily JOE Reward"].rank(method ="min", ascending=False)
-    df["JOE Stake Percentage"] = (df["JOE Stake"] / df["JOE Stake"].sum()).apply(lambda x: f"{x:.3%}")
-    df["veJOE Balance Percentage"] = (df["veJOE Balance"] / df["veJOE Balance"].sum()).apply(lambda x: f"{x:.3%}")
-    df["Daily JOE Reward Percentage"] = (df["Daily JOE Reward"] / df["Daily JOE Reward"].sum()).apply(lambda x: f"{x:.3%}")
+# Introspected schemas are cached on disk as SDL, so new clients validate queries without an
+# introspection round trip. The boosted pools endpoint has always been queried without validation.
+SCHEMA_DIR = "jsons/schemas"
+SCHEMA_MAX_AGE_SECONDS = 24 * 60 * 60
+SCHEMA_VALIDATED_URLS = [SJOE_URL, VEJOE_URL, RJOE_URL]
+
+thread_local = threading.local()
+schema_lock = threading.Lock()
+
+# Every query goes through execute_query: failed attempts are retried with jittered exponential
+# backoff, an endpoint failing repeatedly is skipped for a cooldown (circuit breaker), and
+# hedged queries are sent a second time when the first is slower than the endpoint's usual p95.
+# Attempts (retries and hedges included) share one rolling per-minute budget across endpoints.
+REQUEST_TIMEOUT_SECONDS = 60
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 20.0
+CIRCUIT_BREAKER_FAILURES = 5
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = 2 * 60
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY_SECONDS = 2.0
+REQUEST_BUDGET_PER_MINUTE = 600
+
+# url -> consecutive failed attempts, when the breaker opened and when its half-open trial started
+circuit_breakers: Dict[str, Dict[str, Any]] = {}
+# url -> latencies of recent successful attempts
+latencies: Dict[str, Deque[float]] = {}
+endpoint_state_lock = threading.Lock()
+# sized from COLLECTIONS on first use, see get_hedge_executor and get_prefetch_executor
+hedge_executor: Optional[ThreadPoolExecutor] = None
+hedge_executor_lock = threading.Lock()
+prefetch_executor: Optional[ThreadPoolExecutor] = None
+prefetch_executor_lock = threading.Lock()
+# start times of the attempts sent in the last minute
+request_times: Deque[float] = deque()
+request_times_lock = threading.Lock()
+
+
+@lru_cache(maxsize=256)
+def parse_query(str_query: str) -> "DocumentNode":
+    # gql is imported on the first query, not when this module is imported
+    from gql import gql
+    return gql(str_query)
+
+
+def get_schema_path(url: str) -> str:
+    return os.path.join(SCHEMA_DIR, f"{url.rstrip('/').rsplit('/', 1)[-1]}.graphql")
+
+
+def fetch_schema(url: str) -> str:
+    from graphql import build_client_schema, get_introspection_query, parse, print_schema
+    from pooled_transport import PooledRequestsHTTPTransport
+
+    transport = PooledRequestsHTTPTransport(url=url, timeout=REQUEST_TIMEOUT_SECONDS, pool_maxsize=get_pool_maxsize())
+    transport.connect()
+    try:
+        result = transport.execute(parse(get_introspection_query()))
+    finally:
+        transport.close()
+    if result.errors:
+        raise Exception(f"introspection of {url} failed: {result.errors}")
+    return print_schema(build_client_schema(result.data))
+
+
+def get_schema(url: str) -> Optional[str]:
+    # the cached SDL, refreshed once a day; a stale copy is still better than none
+    path = get_schema_path(url)
+    with schema_lock:
+        is_fresh = os.path.exists(path) and time.time() - os.path.getmtime(path) < SCHEMA_MAX_AGE_SECONDS
+        if not is_fresh:
+            try:
+                schema = fetch_schema(url)
+            except Exception as e:
+                print(f"fetching the schema of {url} failed: {e!r}")
+            else:
+                os.makedirs(SCHEMA_DIR, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, mode="w") as f:
+                    f.write(schema)
+                os.replace(tmp_path, path)
+        if not os.path.exists(path):
+            return None
+        with open(path, mode="r") as f:
+            return f.read()
+
+
+def make_client(url: str) -> "Client":
+    from gql import Client
+    from pooled_transport import PooledRequestsHTTPTransport
+
+    transport = PooledRequestsHTTPTransport(url=url, timeout=REQUEST_TIMEOUT_SECONDS, pool_maxsize=get_pool_maxsize())
+    if url not in SCHEMA_VALIDATED_URLS:
+        return Client(transport=transport)
+    schema = get_schema(url)
+    if schema is None:
+        return Client(transport=transport, fetch_schema_from_transport=True)
+    return Client(transport=transport, schema=schema)
+
+
+def get_client(url: str) -> "Client":
+    # clients are built on first use; a Client can only run one request at a time, so every
+    # thread gets its own
+    if not hasattr(thread_local, "clients"):
+        thread_local.clients = {}
+    if url not in thread_local.clients:
+        thread_local.clients[url] = make_client(url)
+    return thread_local.clients[url]
+
+
+def check_circuit_breaker(url: str) -> None:
+    with endpoint_state_lock:
+        breaker = circuit_breakers.get(url)
+        if breaker is None or breaker["opened_at"] is None:
+            return
+        now = time.monotonic()
+        if now - breaker["opened_at"] < CIRCUIT_BREAKER_COOLDOWN_SECONDS:
+            raise Exception(f"circuit breaker for {url} is open after {breaker['failures']} failed attempts")
+        # half-open: a single trial attempt goes through, its outcome closes or re-opens the
+        # breaker; a trial that never reports back is replaced after another cooldown
+        if breaker["probing_since"] is not None and now - breaker["probing_since"] < CIRCUIT_BREAKER_COOLDOWN_SECONDS:
+            raise Exception(f"circuit breaker for {url} is half-open, waiting for its trial attempt")
+        breaker["probing_since"] = now
+
+
+def record_attempt(url: str, latency: Optional[float]) -> None:
+    # `latency` is None for a failed attempt
+    with endpoint_state_lock:
+        breaker = circuit_breakers.setdefault(url, {"failures": 0, "opened_at": None, "probing_since": None})
+        breaker["probing_since"] = None
+        if latency is None:
+            breaker["failures"] += 1
+            if breaker["failures"] >= CIRCUIT_BREAKER_FAILURES:
+                breaker["opened_at"] = time.monotonic()
+        else:
+            breaker["failures"] = 0
+            breaker["opened_at"] = None
+            latencies.setdefault(url, deque(maxlen=100)).append(latency)
+
+
+def get_hedge_delay(url: str) -> Optional[float]:
+    with endpoint_state_lock:
+        samples = list(latencies.get(url, []))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return max(HEDGE_MIN_DELAY_SECONDS, float(np.percentile(samples, 95)))
+
+
+def get_num_recent_requests() -> int:
+    with request_times_lock:
+        now = time.monotonic()
+        while len(request_times) > 0 and now - request_times[0] >= 60:
+            request_times.popleft()
+        return len(request_times)
+
+
+def acquire_request_budget() -> None:
+    # blocks until one more attempt fits in the last minute's budget
+    while True:
+        with request_times_lock:
+            now = time.monotonic()
+            while len(request_times) > 0 and now - request_times[0] >= 60:
+                request_times.popleft()
+            if len(request_times) < REQUEST_BUDGET_PER_MINUTE:
+                request_times.append(now)
+                return
+            wait_seconds = 60 - (now - request_times[0])
+        time.sleep(wait_seconds)
+
+
+def get_pool_maxsize() -> int:
+    # every thread that can be sending a request at once: the hedge workers, the shard and
+    # prefetch threads that send unhedged attempts themselves, and one thread per source
+    num_shards = sum(collection.num_shards for collection in COLLECTIONS.values())
+    return 4 * num_shards + len(COLLECTION_SOURCES)
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    # room for a primary and a hedge from every shard of every collection crawled at once, so
+    # attempts do not queue behind each other
+    global hedge_executor
+    with hedge_executor_lock:
+        if hedge_executor is None:
+            num_shards = sum(collection.num_shards for collection in COLLECTIONS.values())
+            hedge_executor = ThreadPoolExecutor(max_workers=2 * num_shards, thread_name_prefix="hedge")
+        return hedge_executor
+
+
+def execute_attempt(
+    url: str,
+    query: "DocumentNode",
+    variable_values: Optional[Dict[str, Any]],
+    started: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    # `started` is set once the request is actually sent
+    from gql.transport.exceptions import TransportError, TransportQueryError
+    from requests.exceptions import RequestException
+
+    acquire_request_budget()
+    if started is not None:
+        started.set()
+    start = time.perf_counter()
+    try:
+        result = get_client(url).execute(query, variable_values=variable_values)
+    except TransportQueryError:
+        # the endpoint answered with GraphQL errors: the query is at fault, not the endpoint
+        record_attempt(url, time.perf_counter() - start)
+        raise
+    except (TransportError, RequestException):
+        record_attempt(url, None)
+        raise
+    record_attempt(url, time.perf_counter() - start)
+    return result
+
+
+def execute_hedged_attempt(url: str, query: "DocumentNode", variable_values: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # the duplicate runs on another thread, so it gets its own client; the slower one is
+    # left to finish in the background. The hedge delay counts from when the primary is sent, so
+    # time spent waiting for a worker or for the request budget does not trigger a hedge.
+    from gql.transport.exceptions import TransportQueryError
+
+    hedge_delay = get_hedge_delay(url)
+    if hedge_delay is None:
+        return execute_attempt(url, query, variable_values)
+    executor = get_hedge_executor()
+    started = threading.Event()
+    primary = executor.submit(execute_attempt, url, query, variable_values, started)
+    while not started.wait(timeout=0.1):
+        if primary.done():
+            break
+    done, _ = wait([primary], timeout=hedge_delay)
+    if len(done) > 0:
+        return primary.result()
+
+    hedge = executor.submit(execute_attempt, url, query, variable_values)
+    with endpoint_state_lock:
+        collector_metrics["num_hedged_requests"] = collector_metrics.get("num_hedged_requests", 0) + 1
+    done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+    first = done.pop()
+    if first.exception() is None or isinstance(first.exception(), TransportQueryError):
+        return first.result()
+    return (hedge if first is primary else primary).result()
+
+
+def execute_query(
+    url: str,
+    query: "DocumentNode",
+    variable_values: Optional[Dict[str, Any]] = None,
+    is_hedged: bool = False,
+) -> Dict[str, Any]:
+    # the single path every subgraph query takes; only idempotent reads may be hedged
+    from gql.transport.exceptions import TransportError, TransportQueryError
+    from requests.exceptions import RequestException
+
+    for attempt in range(MAX_ATTEMPTS):
+        check_circuit_breaker(url)
+        try:
+            if is_hedged:
+                return execute_hedged_attempt(url, query, variable_values)
+            return execute_attempt(url, query, variable_values)
+        except TransportQueryError:
+            # the same query gets the same errors, retrying cannot help
+            raise
+        except (TransportError, RequestException) as e:
+            if attempt + 1 == MAX_ATTEMPTS:
+                raise
+            backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            print(f"query to {url} failed ({e!r}), retrying in {backoff:.1f}s")
+            time.sleep(backoff)
+
+
+JOE_PER_SEC = "1833719582850521436"
+
+
+def rank_min_descending(values: np.ndarray) -> np.ndarray:
+    # same as Series.rank(method="min", ascending=False) for NaN-free input
+    order = np.argsort(-values, kind="mergesort")
+    sorted_values = values[order]
+    positions = np.arange(len(values))
+    is_first_of_tie = np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    first_positions = np.maximum.accumulate(np.where(is_first_of_tie, positions, 0))
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = first_positions + 1
+    return ranks
+
+
+def vejoe_wars_rewards(df_vejoe_users_boosted_pools: pd.DataFrame, df_vejoe_users: pd.DataFrame) -> pd.DataFrame:
+    # float64 port of the Decimal reference in tests/test_vejoe_wars.py: one row per address, sorted by address
+    joe_per_sec = float(Decimal(JOE_PER_SEC) / Decimal("10") ** JOE_DECIMALS)
+    num_secs_in_day = 60 * 60 * 24
+
+    position_addresses = df_vejoe_users_boosted_pools.index.to_numpy()
+    user_addresses = df_vejoe_users.index.to_numpy()
+    addresses, address_codes = np.unique(np.concatenate([position_addresses, user_addresses]), return_inverse=True)
+    position_address_codes = address_codes[:len(position_addresses)]
+    user_address_codes = address_codes[len(position_addresses):]
+
+    joe_stake = np.zeros(len(addresses))
+    joe_stake[user_address_codes] = df_vejoe_users["veJOE.total_JOE_stake"].to_numpy(dtype=np.float64)
+    vejoe_balance = np.zeros(len(addresses))
+    vejoe_balance[user_address_codes] = df_vejoe_users["veJOE.veJOE_balance"].to_numpy(dtype=np.float64)
+
+    pids, pid_codes = np.unique(df_vejoe_users_boosted_pools["pid"].to_numpy(), return_inverse=True)
+    alloc_point = df_vejoe_users_boosted_pools["alloc_point"].to_numpy(dtype=np.float64)
+    vejoe_share_bp = df_vejoe_users_boosted_pools["veJOE_share_bp"].to_numpy(dtype=np.float64)
+    user_lp_amount = df_vejoe_users_boosted_pools["user_lp_amount"].to_numpy(dtype=np.float64)
+    total_lp_amount = df_vejoe_users_boosted_pools["total_lp_amount"].to_numpy(dtype=np.float64)
+
+    user_factor = np.sqrt(vejoe_balance[position_address_codes] * user_lp_amount)
+    total_factor = np.bincount(pid_codes, weights=user_factor, minlength=len(pids))[pid_codes]
+    user_factor_ratio = np.divide(user_factor, total_factor, out=np.zeros_like(user_factor), where=total_factor != 0)
+    user_lp_ratio = np.divide(user_lp_amount, total_lp_amount, out=np.zeros_like(user_lp_amount), where=total_lp_amount != 0)
+
+    first_position_of_pid = np.unique(pid_codes, return_index=True)[1]
+    total_alloc_point = alloc_point[first_position_of_pid].sum()
+    pool_joe_per_sec = joe_per_sec * alloc_point / total_alloc_point
+    boost_joe_per_sec = pool_joe_per_sec * (vejoe_share_bp / 10000) * user_factor_ratio
+    base_joe_per_sec = pool_joe_per_sec * ((10000 - vejoe_share_bp) / 10000) * user_lp_ratio
+
+    user_joe_per_sec = np.bincount(position_address_codes, weights=base_joe_per_sec + boost_joe_per_sec, minlength=len(addresses))
+    user_joe_per_day = user_joe_per_sec * num_secs_in_day
+
+    df = pd.DataFrame({
+        "address": addresses,
+        "JOE Stake": joe_stake,
+        "veJOE Balance": vejoe_balance,
+        "Daily JOE Reward": user_joe_per_day,
+        "JOE Stake Rank": rank_min_descending(joe_stake),
+        "veJOE Balance Rank": rank_min_descending(vejoe_balance),
+        "Daily JOE Reward Rank": rank_min_descending(user_joe_per_day),
+    })
+    # percentages are kept as shares of the total, formatted only when displayed
+    df["JOE Stake Percentage"] = joe_stake / joe_stake.sum()
+    df["veJOE Balance Percentage"] = vejoe_balance / vejoe_balance.sum()
+    df["Daily JOE Reward Percentage"] = user_joe_per_day / user_joe_per_day.sum()
     return df
 
 
-def vejoe_wars_at_multiple_block_numbers(
-    min_block_number: int,
-    max_block_number: int,
-    step_block_number: int,
-) -> List[Dict[str, Any]]:
-    datas = []
-    for block_number in range(min_block_number, max_block_number, step_block_number):
-        datas.append(
-            vejoe_wars_at_block_number(block_number)
-        )
-    
-    return datas
-
-
-def vejoe_wars_at_block_number(block_number: int) -> Dict[str, Any]:
-    platforms = vejoe_get_platforms_at_block_number(block_number)
-    pool = vejoe_get_pool_at_block_number(block_number)
-    data = {
-        **platforms,
-        "Pool": {
-            "block_number": block_number,
-            "platform": "Pool",
-            "address": None,
-            "user": pool["pool"],
-        },
-    }
-    return data
+VEJOE_POOL_ADDRESS = "0x25D85E17dD9e544F6E9F8D44F99602dbF5a97341"
 
+VEJOE_WARS_PLATFORMS = {
+    "YieldYak": "0xe7462905B79370389e8180E300F58f63D35B725F".lower(),
+    "Beefy": "0x1F2A8034f444dc55F963fb5925A9b6eb744EeE2c".lower(),
+    "NorthPole": "0xF30E775240D4137daEa097109FEA882C406D61cc".lower(),
+    "Vector": "0x0E25c07748f727D6CCcD7D2711fD7bD13d13422d".lower(),
+}
 
-def vejoe_get_platforms_at_block_number(block_number: int) -> Dict[str, Any]:
-    from_platform_to_address = {
-        "YieldYak": "0xe7462905B79370389e8180E300F58f63D35B725F".lower(),
-        "Beefy": "0x1F2A8034f444dc55F963fb5925A9b6eb744EeE2c".lower(),
-        "NorthPole": "0xF30E775240D4137daEa097109FEA882C406D61cc".lower(),
-        "Vector": "0x0E25c07748f727D6CCcD7D2711fD7bD13d13422d".lower(),
-    }
+# each block costs 5 aliased fields, so 20 blocks keep a request at 100 fields
+VEJOE_WARS_BLOCKS_PER_REQUEST = 20
+# bounds how long one vejoe_wars_step holds the veJOE endpoint
+VEJOE_WARS_MAX_REQUESTS_PER_STEP = 10
 
-    return {
-        platform: {
-            "block_number": block_number,
-            "platform": platform,
-            "address": address,
-            **vejoe_get_user_at_block_number(address, block_number),
-        }
-        for platform, address in from_platform_to_address.items()
-    }
 
+def vejoe_wars_backfill_chunk_path(checkpoint_dir: str, block_numbers: List[int], step_block_number: int) -> str:
+    return os.path.join(checkpoint_dir, f"{block_numbers[0]}_{block_numbers[-1]}_{step_block_number}.json")
 
-def vejoe_get_pool_at_block_number(block_number: int) -> Dict[str, Any]:
-    str_query = (
-        """
-        query getPool($address: ID!, $blockNumber: Int!) {
-            pool(id: $address, block: {number: $blockNumber}) {
-                id
-                totalStake
-                totalReward
-            }
-        }
-        """
-    )
 
-    # Provide a GraphQL query
-    query = gql(str_query)
+def vejoe_wars_backfill_chunk(block_numbers: List[int], chunk_path: str) -> None:
+    data = vejoe_wars_at_block_numbers(block_numbers)
+    dump_json(data, chunk_path)
 
-    params = {
-        "address": "0x25D85E17dD9e544F6E9F8D44F99602dbF5a97341",
-        "blockNumber": block_number,
-    }
 
-    # Execute the query on the transport
-    result = vejoe_client.execute(query, variable_values=params)
-    return result
+def backfill_vejoe_wars(
+    min_block_number: int,
+    max_block_number: int,
+    step_block_number: int,
+    store_dir: str = VEJOE_WARS_DIR,
+    checkpoint_dir: str = "jsons/vejoe_wars_backfill",
+    blocks_per_request: int = VEJOE_WARS_BLOCKS_PER_REQUEST,
+    max_workers: int = 4,
+) -> None:
+    # every chunk is one batched request whose result is checkpointed on its own,
+    # so a restarted backfill only fetches the chunks that are still missing. The log is assembled
+    # next to `store_dir` and swapped in whole, so `store_dir` only ever holds a finished backfill.
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    block_numbers = list(range(min_block_number, max_block_number, step_block_number))
+    chunks = [
+        block_numbers[i:i + blocks_per_request]
+        for i in range(0, len(block_numbers), blocks_per_request)
+    ]
+    chunk_paths = [
+        vejoe_wars_backfill_chunk_path(checkpoint_dir, chunk, step_block_number)
+        for chunk in chunks
+    ]
 
+    pending = [
+        (chunk, chunk_path)
+        for chunk, chunk_path in zip(chunks, chunk_paths)
+        if not os.path.exists(chunk_path)
+    ]
+    print(f"vejoe_wars backfill: {len(chunks) - len(pending)}/{len(chunks)} chunks already checkpointed")
+
+    num_failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(vejoe_wars_backfill_chunk, chunk, chunk_path)
+            for chunk, chunk_path in pending
+        ]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                num_failed += 1
+
+    if num_failed > 0:
+        raise RuntimeError(f"vejoe_wars backfill: {num_failed} chunks failed, rerun to resume")
+
+    new_store_dir = f"{os.path.normpath(store_dir)}.backfill"
+    shutil.rmtree(new_store_dir, ignore_errors=True)
+    if os.path.isdir(store_dir):
+        shutil.copytree(store_dir, new_store_dir)
+    for chunk_path in chunk_paths:
+        append_vejoe_wars(load_json(chunk_path), new_store_dir, is_published=False)
+    replace_vejoe_wars(new_store_dir, store_dir)
+    shutil.rmtree(checkpoint_dir)
+
+
+def vejoe_wars_at_block_numbers(block_numbers: List[int]) -> List[Dict[str, Any]]:
+    # one aliased query covering every platform and the pool at every requested block
+    selections = []
+    for block_number in block_numbers:
+        for platform, address in VEJOE_WARS_PLATFORMS.items():
+            selections.append(
+                f'{platform}_{block_number}: user(id: "{address}", block: {{number: {block_number}}}) {{ id totalStake totalReward }}'
+            )
+        selections.append(
+            f'Pool_{block_number}: pool(id: "{VEJOE_POOL_ADDRESS}", block: {{number: {block_number}}}) {{ id totalStake totalReward }}'
+        )
 
-def vejoe_get_user_at_block_number(address: str, block_number: int) -> Dict[str, Any]:
+    str_selections = "\n            ".join(selections)
     str_query = (
-        """
-        query getUser($address: ID!, $blockNumber: Int!) {
-            user(id: $address, block: {number: $blockNumber}) {
-                id
-                totalStake
-                totalReward
-            }
-        }
+        f"""
+        query getVejoeWars {{
+            {str_selections}
+        }}
         """
     )
 
     # Provide a GraphQL query
-    query = gql(str_query)
-
-    params = {
-        "address": address,
-        "blockNumber": block_number,
-    }
+    query = parse_query(str_query)
 
     # Execute the query on the transport
-    result = vejoe_client.execute(query, variable_values=params)
-    return result
+    result = execute_query(VEJOE_URL, query)
 
-
-def vejoe_get_users_boosted_pool_positions(last_id: Optional[str] = None) -> Dict[str, Any]:
-    str_query_without_param = (
-        """
-        query getUsersBoostedPoolPositions {
-            users(first: 1000, orderBy: id, orderDirection: asc) {
-                id
-                boostedPoolPositions(first: 1000) {
-                boostedPool {
-                    id
-                    lpToken
-                    allocPoint
-                    veJoeShareBp
-                    totalAmount
-                }
-                totalAmount
-                }
-            }
-        }
-        """
-    )
-
-    str_query_with_param = (
-        """
-        query getUsersBoostedPoolPositions($lastID: ID) {
-            users(first: 1000, orderBy: id, orderDirection: asc, where: { id_gt: $lastID  }) {
-                id
-                boostedPoolPositions(first: 1000) {
-                boostedPool {
-                    id
-                    lpToken
-                    allocPoint
-                    veJoeShareBp
-                    totalAmount
-                }
-                totalAmount
+    return [
+        {
+            **{
+                platform: {
+                    "block_number": block_number,
+                    "platform": platform,
+                    "address": address,
+                    "user": result[f"{platform}_{block_number}"],
                 }
-            }
+                for platform, address in VEJOE_WARS_PLATFORMS.items()
+            },
+            "Pool": {
+                "block_number": block_number,
+                "platform": "Pool",
+                "address": None,
+                "user": result[f"Pool_{block_number}"],
+            },
         }
-        """
-    )
-
-    str_query = str_query_with_param if last_id else str_query_without_param
-
-
-    # Provide a GraphQL query
-    query = gql(str_query)
-
-    params = {
-        "lastID": last_id,
-    }
-
-    # Execute the query on the transport
-    result = vejoe_boosted_pools_transport.execute(query, variable_values=params)
-    return result.data
-
-
-def vejoe_get_all_users_boosted_pool_positions() -> List[Dict[str, Any]]:
-    last_id = None
+        for block_number in block_numbers
+    ]
 
-    all_users = []
-    while True:
-        data = vejoe_get_users_boosted_pool_positions(last_id)
-        users = data["users"]
 
-        if len(users) == 0:
-            break
+class Collection(NamedTuple):
+    url: str
+    # top-level query field, and the normalized frame its rows are converted into
+    entity: str
+    frame: str
+    # dotted field paths fetched for every row (ids and references), and the paths behind each
+    # frame column (or column prefix); only the columns listed in views.VIEW_COLUMNS are fetched
+    key_fields: List[str]
+    column_fields: Dict[str, List[str]]
+    # rows are paged in ascending order of this field
+    cursor_field: str
+    cursor_type: str
+    # full crawls split the (uniformly distributed, hex address) id space into this many ranges
+    # and page them concurrently
+    num_shards: int = 1
+
+
+USER_SHARDS = 4
+
+COLLECTIONS: Dict[str, Collection] = {
+    "vejoe_boosted_pools": Collection(
+        url=VEJOE_BOOSTED_POOLS_URL,
+        entity="boostedPools",
+        frame="vejoe_users_boosted_pools",
+        key_fields=["id"],
+        column_fields={
+            "lp_token": ["lpToken"],
+            "alloc_point": ["allocPoint"],
+            "veJOE_share_bp": ["veJoeShareBp"],
+            "total_lp_amount": ["totalAmount"],
+        },
+        cursor_field="id",
+        cursor_type="ID",
+    ),
+    # positions reference their pool by id, so pool fields are transferred once per pool
+    "vejoe_boosted_pool_positions": Collection(
+        url=VEJOE_BOOSTED_POOLS_URL,
+        entity="boostedPoolPositions",
+        frame="vejoe_users_boosted_pools",
+        key_fields=["id", "user.id", "boostedPool.id"],
+        column_fields={
+            "user_lp_amount": ["totalAmount"],
+        },
+        cursor_field="id",
+        cursor_type="ID",
+    ),
+    "vejoe_users": Collection(
+        url=VEJOE_URL,
+        entity="users",
+        frame="vejoe_users",
+        key_fields=["id"],
+        column_fields={
+            "veJOE.total_JOE_stake": ["totalStake"],
+            "veJOE.veJOE_balance": ["totalReward"],
+            "veJOE.deposit_count": ["depositCount"],
+            "veJOE.withdraw_count": ["withdrawCount"],
+            "veJOE.claim_count": ["claimCount"],
+        },
+        cursor_field="id",
+        cursor_type="ID",
+        num_shards=USER_SHARDS,
+    ),
+    "sjoe_users": Collection(
+        url=SJOE_URL,
+        entity="users",
+        frame="sjoe_users",
+        key_fields=["id"],
+        column_fields={
+            "sJOE.total_JOE_stake": ["totalStake"],
+            "sJOE.total_JOE_deposit_fee": ["totalFee"],
+            "sJOE.deposit_count": ["depositCount"],
+            "sJOE.withdraw_count": ["withdrawCount"],
+            "sJOE.claim_count": ["claimCount"],
+            "sJOE.total_rewards": ["rewards.rewardToken.symbol", "rewards.rewardToken.decimals", "rewards.totalReward"],
+        },
+        cursor_field="id",
+        cursor_type="ID",
+        num_shards=USER_SHARDS,
+    ),
+    "rjoe_users": Collection(
+        url=RJOE_URL,
+        entity="users",
+        frame="rjoe_users",
+        key_fields=["id"],
+        column_fields={
+            "rJOE.total_JOE_stake": ["totalStake"],
+            "rJOE.rJOE_balance": ["totalReward"],
+            "rJOE.deposit_count": ["depositCount"],
+            "rJOE.withdraw_count": ["withdrawCount"],
+        },
+        cursor_field="id",
+        cursor_type="ID",
+        num_shards=USER_SHARDS,
+    ),
+    "vejoe_day_snapshots": Collection(
+        url=VEJOE_URL,
+        entity="daySnapshots",
+        frame="vejoe_day_snapshots",
+        key_fields=["periodStartUnix"],
+        column_fields={
+            "veJOE.total_JOE_stake": ["totalStake"],
+            "veJOE.total_veJOE_reward": ["totalReward"],
+            "veJOE.change_JOE_stake": ["changeInStake"],
+            "veJOE.change_veJOE_reward": ["changeInReward"],
+            "veJOE.total_user_count": ["totalUserCount"],
+            "veJOE.active_user_count": ["activeUserCount"],
+            "veJOE.deposit_count": ["depositCount"],
+            "veJOE.withdraw_count": ["withdrawCount"],
+            "veJOE.claim_count": ["claimCount"],
+        },
+        cursor_field="periodStartUnix",
+        cursor_type="Int",
+    ),
+    "sjoe_day_snapshots": Collection(
+        url=SJOE_URL,
+        entity="daySnapshots",
+        frame="sjoe_day_snapshots",
+        key_fields=["periodStartUnix"],
+        column_fields={
+            "sJOE.total_JOE_stake": ["totalStake"],
+            "sJOE.total_JOE_fee": ["totalFee"],
+            "sJOE.change_JOE_stake": ["changeInStake"],
+            "sJOE.change_JOE_fee": ["changeInFee"],
+            "sJOE.total_user_count": ["totalUserCount"],
+            "sJOE.active_user_count": ["activeUserCount"],
+            "sJOE.deposit_count": ["depositCount"],
+            "sJOE.withdraw_count": ["withdrawCount"],
+            "sJOE.emergency_withdraw_count": ["emergencyWithdrawCount"],
+            "sJOE.claim_count": ["claimCount"],
+            "sJOE.total_rewards": ["rewards.rewardToken.symbol", "rewards.rewardToken.decimals", "rewards.totalReward"],
+            "sJOE.change_in_rewards": ["rewards.rewardToken.symbol", "rewards.rewardToken.decimals", "rewards.changeInReward"],
+        },
+        cursor_field="periodStartUnix",
+        cursor_type="Int",
+    ),
+    "rjoe_day_snapshots": Collection(
+        url=RJOE_URL,
+        entity="daySnapshots",
+        frame="rjoe_day_snapshots",
+        key_fields=["periodStartUnix"],
+        column_fields={
+            "rJOE.total_JOE_stake": ["totalStake"],
+            "rJOE.total_rJOE_reward": ["totalReward"],
+            "rJOE.change_JOE_stake": ["changeInStake"],
+            "rJOE.change_rJOE_reward": ["changeInReward"],
+            "rJOE.total_user_count": ["totalUserCount"],
+            "rJOE.active_user_count": ["activeUserCount"],
+            "rJOE.deposit_count": ["depositCount"],
+            "rJOE.withdraw_count": ["withdrawCount"],
+        },
+        cursor_field="periodStartUnix",
+        cursor_type="Int",
+    ),
+}
+
+
+def get_collection_fields(name: str) -> str:
+    # views builds on this module, so its column lists are only looked up once a query is compiled
+    from views import VIEW_COLUMNS
+
+    collection = COLLECTIONS[name]
+    view_columns = VIEW_COLUMNS[collection.frame]
+    paths = collection.key_fields + [
+        path
+        for column, paths in collection.column_fields.items()
+        if column in view_columns
+        for path in paths
+    ]
+    return render_selection(paths)
 
-        last_id = users[-1]["id"]
-        all_users.extend(users)
-    
-    return all_users
 
+def render_selection(paths: List[str]) -> str:
+    # ["id", "rewards.rewardToken.symbol", "rewards.totalReward"] -> "id rewards { rewardToken { symbol } totalReward }"
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        for field in path.split("."):
+            node = node.setdefault(field, {})
 
-def vejoe_get_users(last_id: Optional[str] = None) -> Dict[str, Any]:
-    str_query_without_param = (
-        """
-        query getUsers {
-            users(first: 1000, orderBy: id, orderDirection: asc) {
-                id
-                totalStake
-                totalReward
-                depositCount
-                withdrawCount
-                claimCount
-            }
-        }
-        """
-    )
+    def render(node: Dict[str, Any]) -> str:
+        return " ".join(
+            f"{field} {{ {render(children)} }}" if len(children) > 0 else field
+            for field, children in node.items()
+        )
 
-    str_query_with_param = (
-        """
-        query getUsers($lastID: ID) {
-            users(first: 1000, orderBy: id, orderDirection: asc, where: { id_gt: $lastID  }) {
-                id
-                totalStake
-                totalReward
-                depositCount
-                withdrawCount
-                claimCount
-            }
-        }
+    return render(tree)
+
+
+# Page sizes adapt per collection within these limits, from the observed time and payload per
+# row, so heavy entities (sJOE users with nested rewards) come back well within the timeout.
+MIN_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+TARGET_PAGE_SECONDS = 5.0
+TARGET_PAGE_BYTES = 2 * 1024 * 1024
+# rows serialized per page to estimate its payload
+PAGE_BYTES_SAMPLE_ROWS = 20
+
+page_stats: Dict[str, Dict[str, float]] = {}
+page_stats_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def compile_collection_query(
+    name: str,
+    has_cursor: bool,
+    is_changed_since: bool,
+    has_lower_bound: bool = False,
+    has_upper_bound: bool = False,
+) -> "DocumentNode":
+    collection = COLLECTIONS[name]
+    variables = ["$first: Int!"]
+    conditions = []
+    if has_cursor:
+        variables.append(f"$cursor: {collection.cursor_type}!")
+        conditions.append(f"{collection.cursor_field}_gt: $cursor")
+    if has_lower_bound:
+        variables.append(f"$lowerBound: {collection.cursor_type}!")
+        conditions.append(f"{collection.cursor_field}_gte: $lowerBound")
+    if has_upper_bound:
+        variables.append(f"$upperBound: {collection.cursor_type}!")
+        conditions.append(f"{collection.cursor_field}_lt: $upperBound")
+    if is_changed_since:
+        variables.append("$blockNumber: Int!")
+        conditions.append("_change_block: { number_gte: $blockNumber }")
+
+    arguments = f"first: $first, orderBy: {collection.cursor_field}, orderDirection: asc"
+    if len(conditions) > 0:
+        arguments += f", where: {{ {', '.join(conditions)} }}"
+
+    return parse_query(
+        f"""
+        query {name}({', '.join(variables)}) {{
+            {collection.entity}({arguments}) {{
+                {get_collection_fields(name)}
+            }}
+        }}
         """
     )
 
-    str_query = str_query_with_param if last_id else str_query_without_param
-
-
-    # Provide a GraphQL query
-    query = gql(str_query)
-
-    params = {
-        "lastID": last_id,
-    }
-
-    # Execute the query on the transport
-    result = vejoe_client.execute(query, variable_values=params)
-    return result
-
-
-def vejoe_get_all_users() -> List[Dict[str, Any]]:
-    last_id = None
-
-    all_users = []
-    while True:
-        data = vejoe_get_users(last_id)
-        users = data["users"]
-
-        if len(users) == 0:
-            break
-
-        last_id = users[-1]["id"]
-        all_users.extend(users)
-    
-    return all_users
 
-
-def sjoe_get_users(last_id: Optional[str] = None) -> Dict[str, Any]:
-    str_query_without_param = (
-        """
-        query getUsers {
-            users(first: 1000, orderBy: id, orderDirection: asc) {
-                id
-                totalStake
-                totalFee
-                rewards {
-                    rewardToken {
-                        id
-                        name
-                        symbol
-                        decimals
-                    }
-                    totalReward
-                }
-                depositCount
-                withdrawCount
-                claimCount
-            }
-        }
-        """
+def get_collection_page(
+    name: str,
+    cursor: Optional[Any] = None,
+    changed_since_block: Optional[int] = None,
+    lower_bound: Optional[Any] = None,
+    upper_bound: Optional[Any] = None,
+    page_size: int = MAX_PAGE_SIZE,
+) -> Dict[str, Any]:
+    # one page of `page_size` rows after `cursor` (or from `lower_bound`) and before `upper_bound`, optionally
+    # only rows changed since `changed_since_block`
+    collection = COLLECTIONS[name]
+    query = compile_collection_query(
+        name,
+        cursor is not None,
+        changed_since_block is not None,
+        lower_bound is not None,
+        upper_bound is not None,
     )
-
-    str_query_with_param = (
-        """
-        query getUsers($lastID: ID) {
-            users(first: 1000, orderBy: id, orderDirection: asc, where: { id_gt: $lastID  }) {
-                id
-                totalStake
-                totalFee
-                rewards {
-                    rewardToken {
-                        id
-                        name
-                        symbol
-                        decimals
-                    }
-                    totalReward
-                }
-                depositCount
-                withdrawCount
-                claimCount
-            }
-        }
-        """
-    )
-
-    str_query = str_query_with_param if last_id else str_query_without_param
-
-
-    # Provide a GraphQL query
-    query = gql(str_query)
-
-    params = {
-        "lastID": last_id,
+    params: Dict[str, Any] = {"first": page_size}
+    if cursor is not None:
+        params["cursor"] = cursor
+    if lower_bound is not None:
+        params["lowerBound"] = lower_bound
+    if upper_bound is not None:
+        params["upperBound"] = upper_bound
+    if changed_since_block is not None:
+        params["blockNumber"] = changed_since_block
+    return execute_query(collection.url, query, params, is_hedged=True)
+
+
+def get_shard_bounds(num_shards: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    # equal ranges of the first two hex digits of an address hold about equally many rows
+    assert 1 <= num_shards <= 256, "`num_shards` must be between 1 and 256"
+    prefixes = [f"0x{i * 256 // num_shards:02x}" for i in range(1, num_shards)]
+    return list(zip([None] + prefixes, prefixes + [None]))
+
+
+def record_page_stat(name: str, stat: str, value: float) -> None:
+    with page_stats_lock:
+        stats = page_stats.setdefault(name, {})
+        # halfway toward the new value, so a single slow page does not swing the page size
+        stats[stat] = value if stat not in stats else (stats[stat] + value) / 2
+
+
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    # one worker for every shard crawled at once; the workers outlive the crawls, so their
+    # thread-local clients and parsed schemas are reused
+    global prefetch_executor
+    with prefetch_executor_lock:
+        if prefetch_executor is None:
+            num_shards = sum(collection.num_shards for collection in COLLECTIONS.values())
+            prefetch_executor = ThreadPoolExecutor(max_workers=num_shards, thread_name_prefix="prefetch")
+        return prefetch_executor
+
+
+def record_page_bytes(name: str, page_rows: List[Dict[str, Any]]) -> None:
+    # serializing a sample of rows is enough to estimate the payload per row
+    sample = page_rows[::max(1, len(page_rows) // PAGE_BYTES_SAMPLE_ROWS)]
+    num_bytes = len(json.dumps(sample, separators=(",", ":")))
+    record_page_stat(name, "bytes_per_row", num_bytes / len(sample))
+
+
+def get_page_size(name: str) -> int:
+    with page_stats_lock:
+        stats = dict(page_stats.get(name, {}))
+    page_size = float(MAX_PAGE_SIZE)
+    if stats.get("seconds_per_row", 0) > 0:
+        page_size = min(page_size, TARGET_PAGE_SECONDS / stats["seconds_per_row"])
+    if stats.get("bytes_per_row", 0) > 0:
+        page_size = min(page_size, TARGET_PAGE_BYTES / stats["bytes_per_row"])
+    return int(min(MAX_PAGE_SIZE, max(MIN_PAGE_SIZE, page_size)))
+
+
+def fetch_collection_page(
+    name: str,
+    page_size: int,
+    cursor: Optional[Any],
+    changed_since_block: Optional[int],
+    lower_bound: Optional[Any],
+    upper_bound: Optional[Any],
+) -> List[Dict[str, Any]]:
+    collection = COLLECTIONS[name]
+    started_at = time.perf_counter()
+    try:
+        page_rows = get_collection_page(name, cursor, changed_since_block, lower_bound, upper_bound, page_size)[collection.entity]
+    except Exception:
+        # count a page that failed even after retries as one that took the whole timeout
+        record_page_stat(name, "seconds_per_row", REQUEST_TIMEOUT_SECONDS / page_size)
+        raise
+    # only full pages, a short last page is mostly fixed overhead
+    if len(page_rows) == page_size:
+        record_page_stat(name, "seconds_per_row", (time.perf_counter() - started_at) / page_size)
+    return page_rows
+
+
+def get_collection_range(
+    name: str,
+    cursor: Optional[Any] = None,
+    changed_since_block: Optional[int] = None,
+    lower_bound: Optional[Any] = None,
+    upper_bound: Optional[Any] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    # pages through one id range; returns its rows and the number of pages it took. The next page
+    # is requested as soon as the cursor is known, so it is in flight while this one is handled.
+    collection = COLLECTIONS[name]
+    num_pages = 0
+
+    rows = []
+    executor = get_prefetch_executor()
+    page_size = get_page_size(name)
+    pending = executor.submit(fetch_collection_page, name, page_size, cursor, changed_since_block, lower_bound, upper_bound)
+    while pending is not None:
+        page_rows = pending.result()
+        num_pages += 1
+        if len(page_rows) > 0:
+            record_page_bytes(name, page_rows)
+
+        # a short page is the last one
+        pending = None
+        if len(page_rows) == page_size:
+            cursor = page_rows[-1][collection.cursor_field]
+            page_size = get_page_size(name)
+            pending = executor.submit(fetch_collection_page, name, page_size, cursor, changed_since_block, None, upper_bound)
+
+        rows.extend(page_rows)
+
+    return rows, num_pages
+
+
+def get_all_collection_rows(name: str, cursor: Optional[Any] = None, changed_since_block: Optional[int] = None) -> List[Dict[str, Any]]:
+    # the single pagination entry point behind every crawler
+    collection = COLLECTIONS[name]
+    started_at = time.perf_counter()
+
+    if collection.num_shards > 1 and cursor is None:
+        # shards are contiguous and ordered, so concatenating them keeps the rows sorted by id
+        with ThreadPoolExecutor(max_workers=collection.num_shards, thread_name_prefix=f"{name}_shard") as executor:
+            shards = list(executor.map(
+                lambda bounds: get_collection_range(name, None, changed_since_block, *bounds),
+                get_shard_bounds(collection.num_shards),
+            ))
+        rows = [row for shard_rows, _ in shards for row in shard_rows]
+        num_pages = sum(shard_num_pages for _, shard_num_pages in shards)
+    else:
+        rows, num_pages = get_collection_range(name, cursor, changed_since_block)
+
+    collector_metrics.setdefault("collections", {})[name] = {
+        "num_shards": collection.num_shards if cursor is None else 1,
+        "num_pages": num_pages,
+        "num_rows": len(rows),
+        "page_size": get_page_size(name),
+        "seconds": round(time.perf_counter() - started_at, 3),
     }
-
-    # Execute the query on the transport
-    result = sjoe_client.execute(query, variable_values=params)
-    return result
-
-
-def sjoe_get_all_users() -> List[Dict[str, Any]]:
-    last_id = None
-
-    all_users = []
-    while True:
-        data = sjoe_get_users(last_id)
-        
-        users = data["users"]
-
-        if len(users) == 0:
-            break
-
-        last_id = users[-1]["id"]
-        all_users.extend(users)
-    
-    return all_users
-
-
-def rjoe_get_users(last_id: Optional[str] = None) -> Dict[str, Any]:
-    str_query_without_param = (
-        """
-        query getUsers {
-            users(first: 1000, orderBy: id, orderDirection: asc) {
-                id
-                totalStake
-                totalReward
-                depositCount
-                withdrawCount
-            }
-        }
-        """
-    )
-
-    str_query_with_param = (
-        """
-        query getUsers($lastID: ID) {
-            users(first: 1000, orderBy: id, orderDirection: asc, where: { id_gt: $lastID  }) {
-                id
-                totalStake
-                totalReward
-                depositCount
-                withdrawCount
-            }
-        }
-        """
-    )
-
-    str_query = str_query_with_param if last_id else str_query_without_param
+    return rows
 
 
-    # Provide a GraphQL query
-    query = gql(str_query)
-
-    params = {
-        "lastID": last_id,
+def vejoe_get_all_users_boosted_pool_positions() -> Dict[str, List[Dict[str, Any]]]:
+    # positions first: pools are never removed, so every position finds its pool
+    boosted_pool_positions = get_all_collection_rows("vejoe_boosted_pool_positions")
+    boosted_pools = get_all_collection_rows("vejoe_boosted_pools")
+    return {
+        "boostedPools": boosted_pools,
+        "boostedPoolPositions": boosted_pool_positions,
     }
 
-    # Execute the query on the transport
-    result = rjoe_client.execute(query, variable_values=params)
-    return result
-
-
-def rjoe_get_all_users() -> List[Dict[str, Any]]:
-    last_id = None
-
-    all_users = []
-    while True:
-        data = rjoe_get_users(last_id)
-        users = data["users"]
-
-        if len(users) == 0:
-            break
-
-        last_id = users[-1]["id"]
-        all_users.extend(users)
-    
-    return all_users
-
-
-def to_sjoe_users_df(sjoe_users: List[Dict[str, Any]]) -> pd.DataFrame:
-    sjoe_users_parsed = (
-        {
-            "address": sjoe_user["id"],
-            "sJOE.total_JOE_stake": Decimal(sjoe_user["totalStake"]),
-            "sJOE.total_JOE_deposit_fee": Decimal(sjoe_user["totalFee"]),
-            "sJOE.deposit_count": Decimal(sjoe_user["depositCount"]),
-            "sJOE.withdraw_count": Decimal(sjoe_user["withdrawCount"]),
-            "sJOE.claim_count": Decimal(sjoe_user["claimCount"]),
-            "sJOE.total_rewards": {
-                reward_dict["rewardToken"]["symbol"]: Decimal(reward_dict["totalReward"]) / Decimal("10") ** Decimal(reward_dict["rewardToken"]["decimals"])
-                # reward_dict["rewardToken"]["id"]: Decimal(reward_dict["totalReward"])
-                for reward_dict in sjoe_user["rewards"]
-            }
-        }
-        for sjoe_user in sjoe_users
-    )
 
-    df_sjoe_users = pd.json_normalize(sjoe_users_parsed, sep=".")
+def vejoe_get_all_users(changed_since_block: Optional[int] = None) -> List[Dict[str, Any]]:
+    return get_all_collection_rows("vejoe_users", changed_since_block=changed_since_block)
+
+
+def sjoe_get_all_users(changed_since_block: Optional[int] = None) -> List[Dict[str, Any]]:
+    return get_all_collection_rows("sjoe_users", changed_since_block=changed_since_block)
+
+
+def rjoe_get_all_users(changed_since_block: Optional[int] = None) -> List[Dict[str, Any]]:
+    return get_all_collection_rows("rjoe_users", changed_since_block=changed_since_block)
+
+
+def parse_amounts(values: List[str], decimals: Decimal, exact: bool = False) -> Union[np.ndarray, List[Decimal]]:
+    # uint256 strings -> float64 token amounts in one bulk conversion; `exact` keeps Decimals
+    if exact:
+        if decimals == 0:
+            return [Decimal(value) for value in values]
+        scale = Decimal("10") ** decimals
+        return [Decimal(value) / scale for value in values]
+    return np.array(values, dtype=np.float64) / float(Decimal("10") ** decimals)
+
+
+def parse_counts(values: List[str], exact: bool = False) -> Union[np.ndarray, List[Decimal]]:
+    if exact:
+        return [Decimal(value) for value in values]
+    try:
+        return np.array(values, dtype=np.int64)
+    except OverflowError:
+        # exact Python ints, only for columns that do not fit into int64
+        return np.array([int(value) for value in values], dtype=object)
+
+
+def parse_rewards(
+    rewards_per_row: List[List[Dict[str, Any]]],
+    amount_key: str,
+    col_prefix: str,
+    exact: bool = False,
+    fill_missing: bool = True,
+) -> Dict[str, Union[np.ndarray, List[Decimal]]]:
+    # one column per reward token symbol; rows without a reward in that token get zero, or NaN
+    # when `fill_missing` is off
+    num_rows = len(rewards_per_row)
+    rows_by_symbol: Dict[str, Tuple[List[int], List[str], Decimal]] = {}
+    for i, rewards in enumerate(rewards_per_row):
+        for reward_dict in rewards:
+            if amount_key not in reward_dict:
+                # not fetched, the views do not use it
+                continue
+            symbol = reward_dict["rewardToken"]["symbol"]
+            decimals = Decimal(reward_dict["rewardToken"]["decimals"])
+            rows, amounts, _ = rows_by_symbol.setdefault(symbol, ([], [], decimals))
+            rows.append(i)
+            amounts.append(reward_dict[amount_key])
+
+    cols = {}
+    for symbol, (rows, amounts, decimals) in rows_by_symbol.items():
+        parsed = parse_amounts(amounts, decimals, exact)
+        if exact:
+            col = [Decimal("0") if fill_missing else np.nan] * num_rows
+            for row, amount in zip(rows, parsed):
+                col[row] = amount
+        else:
+            col = np.full(num_rows, 0.0 if fill_missing else np.nan)
+            col[rows] = parsed
+        cols[f"{col_prefix}.{symbol}"] = col
+    return cols
+
+
+def has_field(rows: List[Dict[str, Any]], field: str) -> bool:
+    return all(field in row for row in rows)
+
+
+def parse_fields(
+    rows: List[Dict[str, Any]],
+    specs: List[Tuple[str, str, Callable[[List[Any]], Any]]],
+) -> Dict[str, Any]:
+    # (field, column, parser) -> column, for the fields present in every row; collections are
+    # fetched with only the fields the views use, and raw json from older syncs may hold more
+    return {
+        col: parse([row[field] for row in rows])
+        for field, col, parse in specs
+        if has_field(rows, field)
+    }
 
-    reward_cols = [c for c in df_sjoe_users.columns if c.startswith("sJOE.total_rewards")]
-    df_sjoe_users[reward_cols] = df_sjoe_users[reward_cols].fillna(Decimal("0"))
 
-    cols_in_terms_of_joe = [
-        "sJOE.total_JOE_stake",
-        "sJOE.total_JOE_deposit_fee",
-    ]
+def to_sjoe_users_df(sjoe_users: List[Dict[str, Any]], exact: bool = False) -> pd.DataFrame:
+    amounts = partial(parse_amounts, decimals=JOE_DECIMALS, exact=exact)
+    counts = partial(parse_counts, exact=exact)
+    df_sjoe_users = pd.DataFrame({
+        "address": [sjoe_user["id"] for sjoe_user in sjoe_users],
+        **parse_fields(sjoe_users, [
+            ("totalStake", "sJOE.total_JOE_stake", amounts),
+            ("totalFee", "sJOE.total_JOE_deposit_fee", amounts),
+            ("depositCount", "sJOE.deposit_count", counts),
+            ("withdrawCount", "sJOE.withdraw_count", counts),
+            ("claimCount", "sJOE.claim_count", counts),
+        ]),
+        **(parse_rewards([sjoe_user["rewards"] for sjoe_user in sjoe_users], "totalReward", "sJOE.total_rewards", exact) if has_field(sjoe_users, "rewards") else {}),
+    })
 
-    df_sjoe_users[cols_in_terms_of_joe] = df_sjoe_users[cols_in_terms_of_joe] / Decimal("10") ** JOE_DECIMALS
     df_sjoe_users.set_index(keys=["address"], inplace=True)
 
     return df_sjoe_users
 
 
-def to_vejoe_users_boosted_pools_df(vejoe_users_boosted_pools: List[Dict[str, Any]]) -> pd.DataFrame:
-    vejoe_users_boosted_pools_parsed = [
-        {
-            "address": user["id"],
-            "lp_token": boosted_pool_position["boostedPool"]["lpToken"],
-            "pid": int(boosted_pool_position["boostedPool"]["id"]),
-            "veJOE_share_bp": Decimal(boosted_pool_position["boostedPool"]["veJoeShareBp"]),
-            "alloc_point": Decimal(boosted_pool_position["boostedPool"]["allocPoint"]),
-            "total_lp_amount": Decimal(boosted_pool_position["boostedPool"]["totalAmount"]),
-            "user_lp_amount": Decimal(boosted_pool_position["totalAmount"]),
-        }
-        for user in vejoe_users_boosted_pools
-        for boosted_pool_position in user["boostedPoolPositions"]
-    ]
+def normalize_vejoe_users_boosted_pools(
+    vejoe_users_boosted_pools: Union[Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    if isinstance(vejoe_users_boosted_pools, dict):
+        return vejoe_users_boosted_pools
+
+    # legacy payload: users with nested positions, each position embedding its whole pool
+    boosted_pools = {}
+    boosted_pool_positions = []
+    for user in vejoe_users_boosted_pools:
+        for position in user["boostedPoolPositions"]:
+            boosted_pools[position["boostedPool"]["id"]] = position["boostedPool"]
+            boosted_pool_positions.append({
+                "user": {"id": user["id"]},
+                "boostedPool": {"id": position["boostedPool"]["id"]},
+                "totalAmount": position["totalAmount"],
+            })
+    return {
+        "boostedPools": list(boosted_pools.values()),
+        "boostedPoolPositions": boosted_pool_positions,
+    }
 
-    df = pd.DataFrame(vejoe_users_boosted_pools_parsed)
+
+def to_vejoe_users_boosted_pools_df(
+    vejoe_users_boosted_pools: Union[Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]],
+    exact: bool = False,
+) -> pd.DataFrame:
+    data = normalize_vejoe_users_boosted_pools(vejoe_users_boosted_pools)
+    pools = data["boostedPools"]
+    positions = data["boostedPoolPositions"]
+
+    df_pools = pd.DataFrame({
+        "pid": np.array([pool["id"] for pool in pools], dtype=np.int64),
+        "lp_token": [pool["lpToken"] for pool in pools],
+        "veJOE_share_bp": parse_counts([pool["veJoeShareBp"] for pool in pools], exact),
+        "alloc_point": parse_counts([pool["allocPoint"] for pool in pools], exact),
+        "total_lp_amount": parse_amounts([pool["totalAmount"] for pool in pools], Decimal("0"), exact),
+    })
+    df_pools.set_index(keys=["pid"], inplace=True)
+
+    df = pd.DataFrame({
+        "address": [position["user"]["id"] for position in positions],
+        "pid": np.array([position["boostedPool"]["id"] for position in positions], dtype=np.int64),
+        "user_lp_amount": parse_amounts([position["totalAmount"] for position in positions], Decimal("0"), exact),
+    })
+    df = df.join(df_pools, on="pid")
+    df = df[["address", "lp_token", "pid", "veJOE_share_bp", "alloc_point", "total_lp_amount", "user_lp_amount"]]
 
     df.set_index(keys=["address"], inplace=True)
 
     return df
 
 
-def to_vejoe_users_df(vejoe_users: List[Dict[str, Any]]) -> pd.DataFrame:
-    vejoe_users_parsed = (
-        {
-            "address": vejoe_user["id"],
-            "veJOE.total_JOE_stake": Decimal(vejoe_user["totalStake"]),
-            "veJOE.veJOE_balance": Decimal(vejoe_user["totalReward"]),
-            "veJOE.deposit_count": Decimal(vejoe_user["depositCount"]),
-            "veJOE.withdraw_count": Decimal(vejoe_user["withdrawCount"]),
-            "veJOE.claim_count": Decimal(vejoe_user["claimCount"]),
-        }
-        for vejoe_user in vejoe_users
-    )
-
-    df_vejoe_users = pd.json_normalize(vejoe_users_parsed, sep=".")
-
-    cols_in_terms_of_joe = [
-        "veJOE.total_JOE_stake",
-    ]
+def to_vejoe_users_df(vejoe_users: List[Dict[str, Any]], exact: bool = False) -> pd.DataFrame:
+    counts = partial(parse_counts, exact=exact)
+    df_vejoe_users = pd.DataFrame({
+        "address": [vejoe_user["id"] for vejoe_user in vejoe_users],
+        **parse_fields(vejoe_users, [
+            ("totalStake", "veJOE.total_JOE_stake", partial(parse_amounts, decimals=JOE_DECIMALS, exact=exact)),
+            ("totalReward", "veJOE.veJOE_balance", partial(parse_amounts, decimals=VEJOE_DECIMALS, exact=exact)),
+            ("depositCount", "veJOE.deposit_count", counts),
+            ("withdrawCount", "veJOE.withdraw_count", counts),
+            ("claimCount", "veJOE.claim_count", counts),
+        ]),
+    })
 
-    cols_in_terms_of_vejoe = [
-        "veJOE.veJOE_balance",
-    ]
-
-    df_vejoe_users[cols_in_terms_of_joe] = df_vejoe_users[cols_in_terms_of_joe] / Decimal("10") ** JOE_DECIMALS
-    df_vejoe_users[cols_in_terms_of_vejoe] = df_vejoe_users[cols_in_terms_of_vejoe] / Decimal("10") ** VEJOE_DECIMALS
     df_vejoe_users.set_index(keys=["address"], inplace=True)
 
     return df_vejoe_users
 
 
-def to_rjoe_users_df(rjoe_users: List[Dict[str, Any]]) -> pd.DataFrame:
-    rjoe_users_parsed = (
-        {
-            "address": rjoe_user["id"],
-            "rJOE.total_JOE_stake": Decimal(rjoe_user["totalStake"]),
-            "rJOE.rJOE_balance": Decimal(rjoe_user["totalReward"]),
-            "rJOE.deposit_count": Decimal(rjoe_user["depositCount"]),
-            "rJOE.withdraw_count": Decimal(rjoe_user["withdrawCount"]),
-        }
-        for rjoe_user in rjoe_users
-    )
+def to_rjoe_users_df(rjoe_users: List[Dict[str, Any]], exact: bool = False) -> pd.DataFrame:
+    counts = partial(parse_counts, exact=exact)
+    df_rjoe_users = pd.DataFrame({
+        "address": [rjoe_user["id"] for rjoe_user in rjoe_users],
+        **parse_fields(rjoe_users, [
+            ("totalStake", "rJOE.total_JOE_stake", partial(parse_amounts, decimals=JOE_DECIMALS, exact=exact)),
+            ("totalReward", "rJOE.rJOE_balance", partial(parse_amounts, decimals=RJOE_DECIMALS, exact=exact)),
+            ("depositCount", "rJOE.deposit_count", counts),
+            ("withdrawCount", "rJOE.withdraw_count", counts),
+        ]),
+    })
 
-    df_rjoe_users = pd.json_normalize(rjoe_users_parsed, sep=".")
+    df_rjoe_users.set_index(keys=["address"], inplace=True)
 
-    cols_in_terms_of_joe = [
-        "rJOE.total_JOE_stake",
-    ]
+    return df_rjoe_users
 
-    cols_in_terms_of_vejoe = [
-        "rJOE.rJOE_balance",
-    ]
 
-    df_rjoe_users[cols_in_terms_of_joe] = df_rjoe_users[cols_in_terms_of_joe] / Decimal("10") ** JOE_DECIMALS
-    df_rjoe_users[cols_in_terms_of_vejoe] = df_rjoe_users[cols_in_terms_of_vejoe] / Decimal("10") ** RJOE_DECIMALS
-    df_rjoe_users.set_index(keys=["address"], inplace=True)
+def vejoe_get_all_day_snapshots(last_period_start_unix: Optional[int] = None) -> List[Dict[str, Any]]:
+    return get_all_collection_rows("vejoe_day_snapshots", last_period_start_unix)
 
-    return df_rjoe_users
 
+def sjoe_get_all_day_snapshots(last_period_start_unix: Optional[int] = None) -> List[Dict[str, Any]]:
+    return get_all_collection_rows("sjoe_day_snapshots", last_period_start_unix)
 
 
+def rjoe_get_all_day_snapshots(last_period_start_unix: Optional[int] = None) -> List[Dict[str, Any]]:
+    return get_all_collection_rows("rjoe_day_snapshots", last_period_start_unix)
 
-def vejoe_get_day_snapshots(last_period_start_unix: Optional[int] = None) -> Dict[str, Any]:
-    str_query_without_param = (
-        """
-        query getDaySnapshots {
-            daySnapshots(first: 1000, orderBy: periodStartUnix, orderDirection: asc) {
-                id
-                periodStartUnix
-                totalStake
-                changeInStake
-                totalReward
-                changeInReward
-                totalUserCount
-                activeUserCount
-                depositCount
-                withdrawCount
-                claimCount
-            }
-        }
-        """
-    )
 
-    str_query_with_param = (
-        """
-        query getDaySnapshots($lastPeriodStartUnix: Int!) {
-            daySnapshots(first: 1000, orderBy: periodStartUnix, orderDirection: asc, where: { periodStartUnix_gt: $lastPeriodStartUnix  }) {
-                id
-                periodStartUnix
-                totalStake
-                changeInStake
-                totalReward
-                changeInReward
-                totalUserCount
-                activeUserCount
-                depositCount
-                withdrawCount
-                claimCount
-            }
-        }
-        """
-    )
+def to_vejoe_day_snapshots_df(vejoe_day_snapshots: List[Dict[str, Any]], exact: bool = False) -> pd.DataFrame:
+    joe_amounts = partial(parse_amounts, decimals=JOE_DECIMALS, exact=exact)
+    vejoe_amounts = partial(parse_amounts, decimals=VEJOE_DECIMALS, exact=exact)
+    counts = partial(parse_counts, exact=exact)
+    df_vejoe_day_snapshots = pd.DataFrame({
+        "date": pd.to_datetime(parse_counts([vejoe_day_snapshot["periodStartUnix"] for vejoe_day_snapshot in vejoe_day_snapshots]), unit="s"),
+        **parse_fields(vejoe_day_snapshots, [
+            ("totalStake", "veJOE.total_JOE_stake", joe_amounts),
+            ("totalReward", "veJOE.total_veJOE_reward", vejoe_amounts),
+            ("changeInStake", "veJOE.change_JOE_stake", joe_amounts),
+            ("changeInReward", "veJOE.change_veJOE_reward", vejoe_amounts),
+            ("totalUserCount", "veJOE.total_user_count", counts),
+            ("activeUserCount", "veJOE.active_user_count", counts),
+            ("depositCount", "veJOE.deposit_count", counts),
+            ("withdrawCount", "veJOE.withdraw_count", counts),
+            ("claimCount", "veJOE.claim_count", counts),
+        ]),
+    })
 
+    df_vejoe_day_snapshots.set_index(keys=["date"], inplace=True)
 
-    str_query = str_query_with_param if last_period_start_unix else str_query_without_param
+    return df_vejoe_day_snapshots
 
 
-    # Provide a GraphQL query
-    query = gql(str_query)
+def to_sjoe_day_snapshots_df(sjoe_day_snapshots: List[Dict[str, Any]], exact: bool = False) -> pd.DataFrame:
+    amounts = partial(parse_amounts, decimals=JOE_DECIMALS, exact=exact)
+    counts = partial(parse_counts, exact=exact)
+    df_sjoe_day_snapshots = pd.DataFrame({
+        "date": pd.to_datetime(parse_counts([sjoe_day_snapshot["periodStartUnix"] for sjoe_day_snapshot in sjoe_day_snapshots]), unit="s"),
+        **parse_fields(sjoe_day_snapshots, [
+            ("totalStake", "sJOE.total_JOE_stake", amounts),
+            ("totalFee", "sJOE.total_JOE_fee", amounts),
+            ("changeInStake", "sJOE.change_JOE_stake", amounts),
+            ("changeInFee", "sJOE.change_JOE_fee", amounts),
+            ("totalUserCount", "sJOE.total_user_count", counts),
+            ("activeUserCount", "sJOE.active_user_count", counts),
+            ("depositCount", "sJOE.deposit_count", counts),
+            ("withdrawCount", "sJOE.withdraw_count", counts),
+            ("emergencyWithdrawCount", "sJOE.emergency_withdraw_count", counts),
+            ("claimCount", "sJOE.claim_count", counts),
+        ]),
+        **(parse_rewards([sjoe_day_snapshot["rewards"] for sjoe_day_snapshot in sjoe_day_snapshots], "totalReward", "sJOE.total_rewards", exact, fill_missing=False) if has_field(sjoe_day_snapshots, "rewards") else {}),
+        **(parse_rewards([sjoe_day_snapshot["rewards"] for sjoe_day_snapshot in sjoe_day_snapshots], "changeInReward", "sJOE.change_in_rewards", exact, fill_missing=False) if has_field(sjoe_day_snapshots, "rewards") else {}),
+    })
 
-    params = {
-        "lastPeriodStartUnix": last_period_start_unix,
-    }
+    df_sjoe_day_snapshots.set_index(keys=["date"], inplace=True)
 
-    # Execute the query on the transport
-    result = vejoe_client.execute(query, variable_values=params)
-    return result
+    return df_sjoe_day_snapshots
 
 
-def vejoe_get_all_day_snapshots() -> List[Dict[str, Any]]:
-    last_period_start_unix = None
+def to_rjoe_day_snapshots_df(rjoe_day_snapshots: List[Dict[str, Any]], exact: bool = False) -> pd.DataFrame:
+    joe_amounts = partial(parse_amounts, decimals=JOE_DECIMALS, exact=exact)
+    rjoe_amounts = partial(parse_amounts, decimals=RJOE_DECIMALS, exact=exact)
+    counts = partial(parse_counts, exact=exact)
+    df_rjoe_day_snapshots = pd.DataFrame({
+        "date": pd.to_datetime(parse_counts([rjoe_day_snapshot["periodStartUnix"] for rjoe_day_snapshot in rjoe_day_snapshots]), unit="s"),
+        **parse_fields(rjoe_day_snapshots, [
+            ("totalStake", "rJOE.total_JOE_stake", joe_amounts),
+            ("totalReward", "rJOE.total_rJOE_reward", rjoe_amounts),
+            ("changeInStake", "rJOE.change_JOE_stake", joe_amounts),
+            ("changeInReward", "rJOE.change_rJOE_reward", rjoe_amounts),
+            ("totalUserCount", "rJOE.total_user_count", counts),
+            ("activeUserCount", "rJOE.active_user_count", counts),
+            ("depositCount", "rJOE.deposit_count", counts),
+            ("withdrawCount", "rJOE.withdraw_count", counts),
+        ]),
+    })
 
-    all_day_snapshots = []
-    while True:
-        data = vejoe_get_day_snapshots(last_period_start_unix)
-        daySnapshots = data["daySnapshots"]
+    df_rjoe_day_snapshots.set_index(keys=["date"], inplace=True)
 
-        if len(daySnapshots) == 0:
-            break
+    return df_rjoe_day_snapshots
 
-        last_period_start_unix = daySnapshots[-1]["periodStartUnix"]
-        all_day_snapshots.extend(daySnapshots)
-    
-    return all_day_snapshots
 
+def to_vejoe_wars_df(vejoe_wars_raw: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    platform_block_datas = [
+        platform_block_data
+        for block_data in vejoe_wars_raw
+        for platform_block_data in block_data.values()
+    ]
+    # "nan" marks blocks where the platform had no position yet
+    df = pd.DataFrame({
+        "block_number": [platform_block_data["block_number"] for platform_block_data in platform_block_datas],
+        "platform": [platform_block_data["platform"] for platform_block_data in platform_block_datas],
+        "total_stake": parse_amounts([
+            platform_block_data["user"]["totalStake"] if platform_block_data.get("user") is not None else "nan"
+            for platform_block_data in platform_block_datas
+        ], JOE_DECIMALS),
+        "total_reward": parse_amounts([
+            platform_block_data["user"]["totalReward"] if platform_block_data.get("user") is not None else "nan"
+            for platform_block_data in platform_block_datas
+        ], VEJOE_DECIMALS),
+    })
+    return df
 
-def sjoe_get_day_snapshots(last_period_start_unix: Optional[int] = None) -> Dict[str, Any]:
-    str_query_without_param = (
-        """
-        query getDaySnapshots {
-            daySnapshots(first: 1000, orderBy: periodStartUnix, orderDirection: asc) {
-                id
-                dayIndex
-                periodStartUnix
-                totalStake
-                changeInStake
-                totalFee
-                changeInFee
-                rewards {
-                    rewardToken {
-                        id
-                        name
-                        symbol
-                        decimals
+
+# raw subgraph json -> (converter, name of the normalized columnar frame read by the dashboard);
+# the raw json stays on disk only as the sync state of the collector
+FRAMES: Dict[str, Tuple[Callable[[Any], pd.DataFrame], str]] = {
+    "jsons/vejoe_get_all_users.json": (to_vejoe_users_df, "vejoe_users"),
+    "jsons/vejoe_get_all_users_boosted_pool_positions.json": (to_vejoe_users_boosted_pools_df, "vejoe_users_boosted_pools"),
+    "jsons/sjoe_get_all_users.json": (to_sjoe_users_df, "sjoe_users"),
+    "jsons/rjoe_get_all_users.json": (to_rjoe_users_df, "rjoe_users"),
+    "jsons/vejoe_get_all_day_snapshots.json": (to_vejoe_day_snapshots_df, "vejoe_day_snapshots"),
+    "jsons/sjoe_get_all_day_snapshots.json": (to_sjoe_day_snapshots_df, "sjoe_day_snapshots"),
+    "jsons/rjoe_get_all_day_snapshots.json": (to_rjoe_day_snapshots_df, "rjoe_day_snapshots"),
+}
+
+
+def publish_frame(json_path: str, data: Any) -> bool:
+    if json_path not in FRAMES:
+        return False
+    to_df, frame_name = FRAMES[json_path]
+    return dump_frame(to_df(data), frame_name)
+
+
+def publish_missing_frames() -> None:
+    # frames for data collected before the columnar store existed
+    for json_path, (_, frame_name) in FRAMES.items():
+        if os.path.exists(json_path) and not os.path.exists(get_frame_path(frame_name)):
+            publish_frame(json_path, load_json(json_path))
+
+
+def get_indexed_block(url: str, block_number: Optional[int] = None) -> Dict[str, Any]:
+    # number and timestamp of the subgraph's head block, or of `block_number`; graph nodes that do
+    # not store block times return a null timestamp
+    if block_number is None:
+        query = parse_query(
+            """
+            query getIndexedBlock {
+                _meta {
+                    block {
+                        number
+                        timestamp
                     }
-                    totalReward
-                    changeInReward
                 }
-                totalUserCount
-                activeUserCount
-                depositCount
-                withdrawCount
-                emergencyWithdrawCount
-                claimCount
             }
-        }
-        """
-    )
-
-    str_query_with_param = (
-        """
-        query getDaySnapshots($lastPeriodStartUnix: Int!) {
-            daySnapshots(first: 1000, orderBy: periodStartUnix, orderDirection: asc, where: { periodStartUnix_gt: $lastPeriodStartUnix  }) {
-                id
-                dayIndex
-                periodStartUnix
-                totalStake
-                changeInStake
-                totalFee
-                changeInFee
-                rewards {
-                    rewardToken {
-                        id
-                        name
-                        symbol
-                        decimals
+            """
+        )
+        result = execute_query(url, query)
+    else:
+        query = parse_query(
+            """
+            query getBlock($blockNumber: Int!) {
+                _meta(block: {number: $blockNumber}) {
+                    block {
+                        number
+                        timestamp
                     }
-                    totalReward
-                    changeInReward
                 }
-                totalUserCount
-                activeUserCount
-                depositCount
-                withdrawCount
-                emergencyWithdrawCount
-                claimCount
             }
-        }
-        """
-    )
-
-
-    str_query = str_query_with_param if last_period_start_unix else str_query_without_param
-
-
-    # Provide a GraphQL query
-    query = gql(str_query)
-
-    params = {
-        "lastPeriodStartUnix": last_period_start_unix,
+            """
+        )
+        result = execute_query(url, query, {"blockNumber": block_number})
+    return result["_meta"]["block"]
+
+
+def merge_users(users: List[Dict[str, Any]], changed_users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    from_id_to_user = {user["id"]: user for user in users}
+    from_id_to_user.update({user["id"]: user for user in changed_users})
+    return [from_id_to_user[id_] for id_ in sorted(from_id_to_user)]
+
+
+def sync_users_to_json(
+    get_all_users: Callable[..., List[Dict[str, Any]]],
+    url: str,
+    path: str,
+    full_sync_every: int = 20,
+) -> bool:
+    # delta sync against the stored watermark; a full crawl every `full_sync_every` cycles
+    # (or when there is no watermark yet) reconciles anything the delta missed
+    state_path = f"{os.path.splitext(path)[0]}.sync_state.json"
+    state = load_json(state_path) if os.path.exists(state_path) and os.path.exists(path) else None
+
+    # read the watermark before crawling so changes made during the crawl are picked up next cycle
+    block_number = get_indexed_block(url)["number"]
+
+    if state is None or state["cycles_since_full_sync"] + 1 >= full_sync_every:
+        users = get_all_users()
+        cycles_since_full_sync = 0
+    else:
+        changed_users = get_all_users(changed_since_block=state["block_number"])
+        users = merge_users(load_json(path), changed_users)
+        cycles_since_full_sync = state["cycles_since_full_sync"] + 1
+
+    dump_json(users, path)
+    is_changed = publish_frame(path, users)
+    dump_json({"block_number": block_number, "cycles_since_full_sync": cycles_since_full_sync}, state_path)
+    return is_changed
+
+
+def resume_day_snapshots_to_json(get_all_day_snapshots: Callable[..., List[Dict[str, Any]]], path: str) -> bool:
+    day_snapshots = load_json(path) if os.path.exists(path) else []
+
+    # only the last stored day can still change, so re-fetch it and anything newer
+    if len(day_snapshots) >= 2:
+        last_closed_period_start_unix = day_snapshots[-2]["periodStartUnix"]
+        new_day_snapshots = get_all_day_snapshots(last_closed_period_start_unix)
+        if len(new_day_snapshots) > 0:
+            day_snapshots = [
+                day_snapshot
+                for day_snapshot in day_snapshots
+                if day_snapshot["periodStartUnix"] <= last_closed_period_start_unix
+            ]
+            day_snapshots.extend(new_day_snapshots)
+    else:
+        day_snapshots = get_all_day_snapshots()
+
+    dump_json(day_snapshots, path)
+    return publish_frame(path, day_snapshots)
+
+
+def fetch_to_json(func: Callable[[], Any], path: str) -> bool:
+    data = func()
+    dump_json(data, path)
+    return publish_frame(path, data)
+
+
+def vejoe_wars_step(store_dir: str = VEJOE_WARS_DIR, block_number_step_size: int = 1000) -> bool:
+    # catch the series up towards the indexed head, at most VEJOE_WARS_MAX_REQUESTS_PER_STEP
+    # requests at a time so the other veJOE sources get the endpoint in between; a step that
+    # added points keeps the source on its shortest interval until it has caught up
+    last_block_number = load_last_vejoe_wars(store_dir)["Pool"]["block_number"]
+    head_block = get_indexed_block(VEJOE_URL)
+    head_block_number = head_block["number"]
+
+    lag_blocks_before_catch_up = head_block_number - last_block_number
+    block_numbers = list(range(last_block_number + block_number_step_size, head_block_number + 1, block_number_step_size))
+    num_remaining_points = max(0, len(block_numbers) - VEJOE_WARS_MAX_REQUESTS_PER_STEP * VEJOE_WARS_BLOCKS_PER_REQUEST)
+    block_numbers = block_numbers[:VEJOE_WARS_MAX_REQUESTS_PER_STEP * VEJOE_WARS_BLOCKS_PER_REQUEST]
+    for i in range(0, len(block_numbers), VEJOE_WARS_BLOCKS_PER_REQUEST):
+        new_data = vejoe_wars_at_block_numbers(block_numbers[i:i + VEJOE_WARS_BLOCKS_PER_REQUEST])
+        append_vejoe_wars(new_data, store_dir)
+        last_block_number = new_data[-1]["Pool"]["block_number"]
+
+    lag_blocks = head_block_number - last_block_number
+    lag_seconds = None
+    if head_block["timestamp"] is not None:
+        last_block_timestamp = get_indexed_block(VEJOE_URL, last_block_number)["timestamp"]
+        if last_block_timestamp is not None:
+            lag_seconds = int(head_block["timestamp"]) - int(last_block_timestamp)
+
+    collector_metrics["vejoe_wars_lag"] = {
+        "head_block_number": head_block_number,
+        "head_timestamp": head_block["timestamp"],
+        "lag_blocks": lag_blocks,
+        "lag_seconds": lag_seconds,
+        "lag_blocks_before_catch_up": lag_blocks_before_catch_up,
+        "num_new_points": len(block_numbers),
+        "num_remaining_points": num_remaining_points,
     }
-
-    # Execute the query on the transport
-    result = sjoe_client.execute(query, variable_values=params)
-    return result
-
-
-def sjoe_get_all_day_snapshots() -> List[Dict[str, Any]]:
-    last_period_start_unix = None
-
-    all_day_snapshots = []
-    while True:
-        data = sjoe_get_day_snapshots(last_period_start_unix)
-        daySnapshots = data["daySnapshots"]
-
-        if len(daySnapshots) == 0:
-            break
-
-        last_period_start_unix = daySnapshots[-1]["periodStartUnix"]
-        all_day_snapshots.extend(daySnapshots)
-    
-    return all_day_snapshots
-
-
-def rjoe_get_day_snapshots(last_period_start_unix: Optional[int] = None) -> Dict[str, Any]:
-    str_query_without_param = (
-        """
-        query getDaySnapshots {
-            daySnapshots(first: 1000, orderBy: periodStartUnix, orderDirection: asc) {
-                id
-                periodStartUnix
-                totalStake
-                changeInStake
-                totalReward
-                changeInReward
-                totalUserCount
-                activeUserCount
-                depositCount
-                withdrawCount
-            }
-        }
-        """
-    )
-
-    str_query_with_param = (
-        """
-        query getDaySnapshots($lastPeriodStartUnix: Int!) {
-            daySnapshots(first: 1000, orderBy: periodStartUnix, orderDirection: asc, where: { periodStartUnix_gt: $lastPeriodStartUnix  }) {
-                id
-                periodStartUnix
-                totalStake
-                changeInStake
-                totalReward
-                changeInReward
-                totalUserCount
-                activeUserCount
-                depositCount
-                withdrawCount
-            }
-        }
-        """
-    )
-
-
-    str_query = str_query_with_param if last_period_start_unix else str_query_without_param
-
-
-    # Provide a GraphQL query
-    query = gql(str_query)
-
-    params = {
-        "lastPeriodStartUnix": last_period_start_unix,
+    print(f"vejoe_wars: {len(block_numbers)} new points, {num_remaining_points} left, {lag_blocks} blocks behind head")
+    return len(block_numbers) > 0
+
+
+# (name, collect function returning whether the data changed, subgraph endpoint the source talks to)
+COLLECTION_SOURCES: List[Tuple[str, Callable[[], bool], str]] = [
+    ("vejoe_users", partial(sync_users_to_json, vejoe_get_all_users, VEJOE_URL, "jsons/vejoe_get_all_users.json"), VEJOE_URL),
+    ("vejoe_users_boosted_pool_positions", partial(fetch_to_json, vejoe_get_all_users_boosted_pool_positions, "jsons/vejoe_get_all_users_boosted_pool_positions.json"), VEJOE_BOOSTED_POOLS_URL),
+    ("sjoe_users", partial(sync_users_to_json, sjoe_get_all_users, SJOE_URL, "jsons/sjoe_get_all_users.json"), SJOE_URL),
+    ("rjoe_users", partial(sync_users_to_json, rjoe_get_all_users, RJOE_URL, "jsons/rjoe_get_all_users.json"), RJOE_URL),
+    ("vejoe_day_snapshots", partial(resume_day_snapshots_to_json, vejoe_get_all_day_snapshots, "jsons/vejoe_get_all_day_snapshots.json"), VEJOE_URL),
+    ("sjoe_day_snapshots", partial(resume_day_snapshots_to_json, sjoe_get_all_day_snapshots, "jsons/sjoe_get_all_day_snapshots.json"), SJOE_URL),
+    ("rjoe_day_snapshots", partial(resume_day_snapshots_to_json, rjoe_get_all_day_snapshots, "jsons/rjoe_get_all_day_snapshots.json"), RJOE_URL),
+    ("vejoe_wars", partial(vejoe_wars_step, VEJOE_WARS_DIR), VEJOE_URL),
+]
+
+# Sources sharing an endpoint are serialized, while different endpoints run in parallel; a
+# source's own concurrency comes from its collection's `num_shards`.
+ENDPOINT_CONCURRENCY = {
+    SJOE_URL: 1,
+    VEJOE_URL: 1,
+    RJOE_URL: 1,
+    VEJOE_BOOSTED_POOLS_URL: 1,
+}
+
+
+class SourceSchedule(NamedTuple):
+    interval_seconds: float
+    # unchanged data doubles the interval up to this, new data resets it
+    max_interval_seconds: float
+    # lower runs first, and only priority 0 runs once most of the request budget is spent
+    priority: int
+
+
+SOURCE_SCHEDULES = {
+    "vejoe_wars": SourceSchedule(30, 5 * 60, 0),
+    "vejoe_users": SourceSchedule(3 * 60, 30 * 60, 1),
+    "sjoe_users": SourceSchedule(3 * 60, 30 * 60, 1),
+    "rjoe_users": SourceSchedule(3 * 60, 30 * 60, 1),
+    "vejoe_users_boosted_pool_positions": SourceSchedule(10 * 60, 60 * 60, 2),
+    # only the current day changes
+    "vejoe_day_snapshots": SourceSchedule(30 * 60, 6 * 60 * 60, 3),
+    "sjoe_day_snapshots": SourceSchedule(30 * 60, 6 * 60 * 60, 3),
+    "rjoe_day_snapshots": SourceSchedule(30 * 60, 6 * 60 * 60, 3),
+}
+DEFAULT_SOURCE_SCHEDULE = SourceSchedule(3 * 60, 30 * 60, 1)
+# every interval is stretched or shrunk by up to this fraction, so sources drift apart
+SCHEDULE_JITTER = 0.1
+# share of the request budget after which only priority 0 sources are started
+LOW_PRIORITY_BUDGET_SHARE = 0.8
+SCHEDULER_TICK_SECONDS = 5
+
+collector_metrics: Dict[str, Any] = {}
+
+
+def collect_source(name: str, func: Callable[[], bool], endpoint_semaphore: threading.Semaphore) -> Tuple[float, Optional[bool]]:
+    # returns the wall time and whether the data changed, None if the source failed
+    with endpoint_semaphore:
+        start = time.perf_counter()
+        try:
+            is_changed = func()
+        except Exception:
+            import traceback
+            print(f"{name} failed")
+            traceback.print_exc()
+            collector_metrics.setdefault("source_succeeded", {})[name] = False
+            is_changed = None
+        else:
+            collector_metrics.setdefault("source_succeeded", {})[name] = True
+        return time.perf_counter() - start, is_changed
+
+
+def collect_all_sources(
+    sources: List[Tuple[str, Callable[[], bool], str]],
+    is_concurrent: bool = True,
+) -> Dict[str, float]:
+    endpoint_semaphores = {
+        url: threading.Semaphore(ENDPOINT_CONCURRENCY.get(url, 1))
+        for _, _, url in sources
     }
 
-    # Execute the query on the transport
-    result = rjoe_client.execute(query, variable_values=params)
-    return result
-
-
-def rjoe_get_all_day_snapshots() -> List[Dict[str, Any]]:
-    last_period_start_unix = None
-
-    all_day_snapshots = []
-    while True:
-        data = rjoe_get_day_snapshots(last_period_start_unix)
-        daySnapshots = data["daySnapshots"]
-
-        if len(daySnapshots) == 0:
-            break
-
-        last_period_start_unix = daySnapshots[-1]["periodStartUnix"]
-        all_day_snapshots.extend(daySnapshots)
-    
-    return all_day_snapshots
-
-
-def to_vejoe_day_snapshots_df(vejoe_day_snapshots: List[Dict[str, Any]]) -> pd.DataFrame:
-    vejoe_day_snapshots_parsed = (
-        {
-            "period_start_unix": int(vejoe_day_snapshot["periodStartUnix"]),
-            "veJOE.total_JOE_stake": Decimal(vejoe_day_snapshot["totalStake"]),
-            "veJOE.total_veJOE_reward": Decimal(vejoe_day_snapshot["totalReward"]),
-            "veJOE.change_JOE_stake": Decimal(vejoe_day_snapshot["changeInStake"]),
-            "veJOE.change_veJOE_reward": Decimal(vejoe_day_snapshot["changeInReward"]),
-            "veJOE.total_user_count": Decimal(vejoe_day_snapshot["totalUserCount"]),
-            "veJOE.active_user_count": Decimal(vejoe_day_snapshot["activeUserCount"]),
-            "veJOE.deposit_count": Decimal(vejoe_day_snapshot["depositCount"]),
-            "veJOE.withdraw_count": Decimal(vejoe_day_snapshot["withdrawCount"]),
-            "veJOE.claim_count": Decimal(vejoe_day_snapshot["claimCount"]),
-        }
-        for vejoe_day_snapshot in vejoe_day_snapshots
-    )
-
-    df_vejoe_day_snapshots = pd.json_normalize(vejoe_day_snapshots_parsed, sep=".")
-
-    # df_vejoe_day_snapshots["date"] = pd.to_datetime(df_vejoe_day_snapshots["period_start_unix"], unit="s").dt.date
-    df_vejoe_day_snapshots["date"] = pd.to_datetime(df_vejoe_day_snapshots["period_start_unix"], unit="s")
-    df_vejoe_day_snapshots.drop(columns=["period_start_unix"], inplace=True)
-
-    cols_in_terms_of_joe = [
-        "veJOE.total_JOE_stake",
-        "veJOE.change_JOE_stake",
-    ]
-
-    cols_in_terms_of_vejoe = [
-        "veJOE.total_veJOE_reward",
-        "veJOE.change_veJOE_reward",
-    ]
-
-    df_vejoe_day_snapshots[cols_in_terms_of_joe] = df_vejoe_day_snapshots[cols_in_terms_of_joe] / Decimal("10") ** JOE_DECIMALS
-    df_vejoe_day_snapshots[cols_in_terms_of_vejoe] = df_vejoe_day_snapshots[cols_in_terms_of_vejoe] / Decimal("10") ** VEJOE_DECIMALS
-    df_vejoe_day_snapshots.set_index(keys=["date"], inplace=True)
-
-    return df_vejoe_day_snapshots
-
-
-def to_sjoe_day_snapshots_df(sjoe_day_snapshots: List[Dict[str, Any]]) -> pd.DataFrame:
-    sjoe_day_snapshots_parsed = (
-        {
-            "period_start_unix": int(sjoe_day_snapshot["periodStartUnix"]),
-            "sJOE.total_JOE_stake": Decimal(sjoe_day_snapshot["totalStake"]),
-            "sJOE.total_JOE_fee": Decimal(sjoe_day_snapshot["totalFee"]),
-            "sJOE.change_JOE_stake": Decimal(sjoe_day_snapshot["changeInStake"]),
-            "sJOE.change_JOE_fee": Decimal(sjoe_day_snapshot["changeInFee"]),
-            "sJOE.total_user_count": Decimal(sjoe_day_snapshot["totalUserCount"]),
-            "sJOE.active_user_count": Decimal(sjoe_day_snapshot["activeUserCount"]),
-            "sJOE.deposit_count": Decimal(sjoe_day_snapshot["depositCount"]),
-            "sJOE.withdraw_count": Decimal(sjoe_day_snapshot["withdrawCount"]),
-            "sJOE.emergency_withdraw_count": Decimal(sjoe_day_snapshot["emergencyWithdrawCount"]),
-            "sJOE.claim_count": Decimal(sjoe_day_snapshot["claimCount"]),
-            "sJOE.total_rewards": {
-                reward_dict["rewardToken"]["symbol"]: Decimal(reward_dict["totalReward"]) / Decimal("10") ** Decimal(reward_dict["rewardToken"]["decimals"])
-                for reward_dict in sjoe_day_snapshot["rewards"]
-            },
-            "sJOE.change_in_rewards": {
-                reward_dict["rewardToken"]["symbol"]: Decimal(reward_dict["changeInReward"]) / Decimal("10") ** Decimal(reward_dict["rewardToken"]["decimals"])
-                for reward_dict in sjoe_day_snapshot["rewards"]
+    start = time.perf_counter()
+    if is_concurrent:
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            futures = {
+                name: executor.submit(collect_source, name, func, endpoint_semaphores[url])
+                for name, func, url in sources
             }
+            wall_times = {name: future.result()[0] for name, future in futures.items()}
+    else:
+        wall_times = {
+            name: collect_source(name, func, endpoint_semaphores[url])[0]
+            for name, func, url in sources
         }
-        for sjoe_day_snapshot in sjoe_day_snapshots
-    )
+    cycle_wall_time = time.perf_counter() - start
 
-    df_sjoe_day_snapshots = pd.json_normalize(sjoe_day_snapshots_parsed, sep=".")
+    for name, wall_time in wall_times.items():
+        print(f"{name}: {wall_time:.2f}s")
+    print(f"cycle: {cycle_wall_time:.2f}s (sum of sources: {sum(wall_times.values()):.2f}s)")
 
-    # df_vejoe_day_snapshots["date"] = pd.to_datetime(df_vejoe_day_snapshots["period_start_unix"], unit="s").dt.date
-    df_sjoe_day_snapshots["date"] = pd.to_datetime(df_sjoe_day_snapshots["period_start_unix"], unit="s")
-    df_sjoe_day_snapshots.drop(columns=["period_start_unix"], inplace=True)
+    collector_metrics["source_wall_times"] = wall_times
+    collector_metrics["cycle_wall_time"] = cycle_wall_time
+    source_succeeded = collector_metrics.get("source_succeeded", {})
+    collector_metrics["cycle_success_rate"] = sum(source_succeeded.get(name, False) for name in wall_times) / len(wall_times)
+    dump_json(collector_metrics, "jsons/collector_metrics.json")
 
-    cols_in_terms_of_joe = [
-        "sJOE.total_JOE_stake",
-        "sJOE.total_JOE_fee",
-        "sJOE.change_JOE_stake",
-        "sJOE.change_JOE_fee",
-    ]
+    return wall_times
 
-    df_sjoe_day_snapshots[cols_in_terms_of_joe] = df_sjoe_day_snapshots[cols_in_terms_of_joe] / Decimal("10") ** JOE_DECIMALS
-    df_sjoe_day_snapshots.set_index(keys=["date"], inplace=True)
 
-    return df_sjoe_day_snapshots
+def prepare_data_gathering() -> None:
+    recover_vejoe_wars(VEJOE_WARS_DIR)
+    migrate_vejoe_wars_json("jsons/vejoe_wars.json", VEJOE_WARS_DIR)
+    publish_missing_frames()
+    if load_last_vejoe_wars(VEJOE_WARS_DIR) is None:
+        backfill_vejoe_wars(12200000, 13760000, 10000, VEJOE_WARS_DIR)
 
 
-def to_rjoe_day_snapshots_df(rjoe_day_snapshots: List[Dict[str, Any]]) -> pd.DataFrame:
-    rjoe_day_snapshots_parsed = (
-        {
-            "period_start_unix": int(rjoe_day_snapshot["periodStartUnix"]),
-            "rJOE.total_JOE_stake": Decimal(rjoe_day_snapshot["totalStake"]),
-            "rJOE.total_rJOE_reward": Decimal(rjoe_day_snapshot["totalReward"]),
-            "rJOE.change_JOE_stake": Decimal(rjoe_day_snapshot["changeInStake"]),
-            "rJOE.change_rJOE_reward": Decimal(rjoe_day_snapshot["changeInReward"]),
-            "rJOE.total_user_count": Decimal(rjoe_day_snapshot["totalUserCount"]),
-            "rJOE.active_user_count": Decimal(rjoe_day_snapshot["activeUserCount"]),
-            "rJOE.deposit_count": Decimal(rjoe_day_snapshot["depositCount"]),
-            "rJOE.withdraw_count": Decimal(rjoe_day_snapshot["withdrawCount"]),
-        }
-        for rjoe_day_snapshot in rjoe_day_snapshots
-    )
+def get_next_interval(schedule: SourceSchedule, interval_seconds: float, is_changed: Optional[bool]) -> float:
+    if is_changed is None:
+        # a failed source keeps its interval; the circuit breaker paces retries to a failing endpoint
+        return interval_seconds
+    if is_changed:
+        return schedule.interval_seconds
+    return min(schedule.max_interval_seconds, interval_seconds * 2)
 
-    df_rjoe_day_snapshots = pd.json_normalize(rjoe_day_snapshots_parsed, sep=".")
 
-    df_rjoe_day_snapshots["date"] = pd.to_datetime(df_rjoe_day_snapshots["period_start_unix"], unit="s")
-    df_rjoe_day_snapshots.drop(columns=["period_start_unix"], inplace=True)
+def add_jitter(seconds: float) -> float:
+    return seconds * random.uniform(1 - SCHEDULE_JITTER, 1 + SCHEDULE_JITTER)
 
-    cols_in_terms_of_joe = [
-        "rJOE.total_JOE_stake",
-        "rJOE.change_JOE_stake",
-    ]
-
-    cols_in_terms_of_rjoe = [
-        "rJOE.total_rJOE_reward",
-        "rJOE.change_rJOE_reward",
-    ]
-
-    df_rjoe_day_snapshots[cols_in_terms_of_joe] = df_rjoe_day_snapshots[cols_in_terms_of_joe] / Decimal("10") ** JOE_DECIMALS
-    df_rjoe_day_snapshots[cols_in_terms_of_rjoe] = df_rjoe_day_snapshots[cols_in_terms_of_rjoe] / Decimal("10") ** RJOE_DECIMALS
-    df_rjoe_day_snapshots.set_index(keys=["date"], inplace=True)
 
-    return df_rjoe_day_snapshots
-
-
-def to_vejoe_wars_df(vejoe_wars_raw: List[Dict[str, Any]]) -> pd.DataFrame:
-    vejoe_wars_parsed = [
-        {
-            "block_number": platform_block_data["block_number"],
-            "platform": platform_block_data["platform"],
-            "total_stake": Decimal(platform_block_data["user"]["totalStake"]) if platform_block_data.get("user") is not None else None,
-            "total_reward": Decimal(platform_block_data["user"]["totalReward"]) if platform_block_data.get("user") is not None else None,
+def record_schedule(states: Dict[str, Dict[str, Any]]) -> None:
+    now = time.time()
+    collector_metrics["schedule"] = {
+        name: {
+            "priority": state["schedule"].priority,
+            "interval_seconds": round(state["interval_seconds"], 1),
+            "is_running": state["is_running"],
+            "next_due_at": round(state["next_due_at"], 1),
+            "next_due_in_seconds": round(max(0.0, state["next_due_at"] - now), 1),
         }
-        for block_data in vejoe_wars_raw
-        for platform_block_data in block_data.values()
-    ]
-    df = pd.DataFrame(vejoe_wars_parsed)
-
-    df["total_reward"] = df["total_reward"] / Decimal("10") ** VEJOE_DECIMALS
-    df["total_stake"] = df["total_stake"] / Decimal("10") ** JOE_DECIMALS
-
-    df["total_stake"] = df["total_stake"].astype(float)
-    df["total_reward"] = df["total_reward"].astype(float)
-    return df
-
-
-def data_gathering_loop() -> None:
-    if not os.path.exists("jsons/vejoe_wars.json"):
-        data = vejoe_wars_at_multiple_block_numbers(12200000, 13760000, 10000)
-        dump_json(data, "jsons/vejoe_wars.json")
-
-
-    funcs_and_json_files = [
-        (vejoe_get_all_users, "jsons/vejoe_get_all_users.json"),
-        (vejoe_get_all_users_boosted_pool_positions, "jsons/vejoe_get_all_users_boosted_pool_positions.json"),
-        (sjoe_get_all_users, "jsons/sjoe_get_all_users.json"),
-        (rjoe_get_all_users, "jsons/rjoe_get_all_users.json"),
-        (vejoe_get_all_day_snapshots, "jsons/vejoe_get_all_day_snapshots.json"),
-        (sjoe_get_all_day_snapshots, "jsons/sjoe_get_all_day_snapshots.json"),
-        (rjoe_get_all_day_snapshots, "jsons/rjoe_get_all_day_snapshots.json"),
-        (vejoe_wars, "jsons/vejoe_wars.json"),
-    ]
-
-    block_number_step_size = 1000
-
-    while True:
-        for func, path in funcs_and_json_files:
-            print(f"{func}")
-            try:
-                if func == vejoe_wars:
-                    data = load_json(path)
-                    last_block_number = data[-1]["Pool"]["block_number"]
-                    block_number = last_block_number + block_number_step_size
-                    newData = vejoe_wars_at_block_number(block_number)
-                    data.append(newData)
-                    dump_json(data, path)
-                else:
-                    data = func()
-                    dump_json(data, path)
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                pass
-        # sleep for 3 minutes
-        time.sleep(3 * 60)
+        for name, state in states.items()
+    }
+    collector_metrics["num_requests_last_minute"] = get_num_recent_requests()
+    dump_json(collector_metrics, "jsons/collector_metrics.json")
+
+
+def run_scheduler(
+    sources: List[Tuple[str, Callable[[], bool], str]],
+    is_concurrent: bool = True,
+    post_collection: Optional[Callable[[], None]] = None,
+) -> None:
+    # starts every source when it is due, highest priority first, as long as its endpoint is free;
+    # `post_collection` runs whenever a source brought new data
+    states = {
+        name: {
+            "func": func,
+            "url": url,
+            "schedule": SOURCE_SCHEDULES.get(name, DEFAULT_SOURCE_SCHEDULE),
+            "interval_seconds": SOURCE_SCHEDULES.get(name, DEFAULT_SOURCE_SCHEDULE).interval_seconds,
+            "next_due_at": time.time(),
+            "is_running": False,
+        }
+        for name, func, url in sources
+    }
+    endpoint_semaphores = {
+        url: threading.Semaphore(ENDPOINT_CONCURRENCY.get(url, 1))
+        for _, _, url in sources
+    }
+    num_running_by_url = {url: 0 for url in endpoint_semaphores}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=len(sources) if is_concurrent else 1, thread_name_prefix="source") as executor:
+        while True:
+            now = time.time()
+            due_names = sorted(
+                (name for name, state in states.items() if not state["is_running"] and state["next_due_at"] <= now),
+                key=lambda name: (states[name]["schedule"].priority, states[name]["next_due_at"]),
+            )
+            num_started = 0
+            for name in due_names:
+                state = states[name]
+                if not is_concurrent and len(running) > 0:
+                    break
+                if num_running_by_url[state["url"]] >= ENDPOINT_CONCURRENCY.get(state["url"], 1):
+                    continue
+                if state["schedule"].priority > 0 and get_num_recent_requests() >= REQUEST_BUDGET_PER_MINUTE * LOW_PRIORITY_BUDGET_SHARE:
+                    continue
+                future = executor.submit(collect_source, name, state["func"], endpoint_semaphores[state["url"]])
+                running[future] = name
+                state["is_running"] = True
+                num_running_by_url[state["url"]] += 1
+                num_started += 1
+            if num_started > 0:
+                record_schedule(states)
+
+            # due sources that were held back wait for a running source to finish (busy endpoint)
+            # or for the next tick (request budget), not for their past due time
+            next_due_at = min(
+                (state["next_due_at"] for name, state in states.items() if not state["is_running"] and name not in due_names),
+                default=now + SCHEDULER_TICK_SECONDS,
+            )
+            timeout = min(max(0.0, next_due_at - now), SCHEDULER_TICK_SECONDS)
+            if len(running) == 0:
+                time.sleep(timeout)
+                continue
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            is_any_changed = False
+            for future in done:
+                name = running.pop(future)
+                state = states[name]
+                wall_time, is_changed = future.result()
+                print(f"{name}: {wall_time:.2f}s, {'changed' if is_changed else 'unchanged' if is_changed is not None else 'failed'}")
+                collector_metrics.setdefault("source_wall_times", {})[name] = wall_time
+                state["is_running"] = False
+                num_running_by_url[state["url"]] -= 1
+                state["interval_seconds"] = get_next_interval(state["schedule"], state["interval_seconds"], is_changed)
+                state["next_due_at"] = time.time() + add_jitter(state["interval_seconds"])
+                is_any_changed = is_any_changed or bool(is_changed)
+
+            if len(done) > 0:
+                if is_any_changed and post_collection is not None:
+                    post_collection()
+                record_schedule(states)
+
+
+def data_gathering_loop(is_concurrent: bool = True, post_collection: Optional[Callable[[], None]] = None) -> None:
+    # `post_collection` runs once up front and then whenever a source brings new data, e.g. to
+    # rebuild the dashboard views
+    prepare_data_gathering()
+    if post_collection is not None:
+        post_collection()
+
+    run_scheduler(COLLECTION_SOURCES, is_concurrent=is_concurrent, post_collection=post_collection)
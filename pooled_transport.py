@@ -0,0 +1,40 @@
+from typing import Any, Dict
+from urllib.parse import urlsplit
+import threading
+from gql.transport.requests import RequestsHTTPTransport
+import requests
+from requests.adapters import HTTPAdapter
+
+
+sessions: Dict[str, requests.Session] = {}
+sessions_lock = threading.Lock()
+
+
+def get_session(url: str, pool_maxsize: int) -> requests.Session:
+    # `pool_maxsize` connections are kept alive per host. It does not bound the requests in
+    # flight: with pool_block=False, a request beyond it still goes out, over a connection that
+    # is closed afterwards, so callers size it for all their threads that send requests.
+    host = urlsplit(url).netloc
+    with sessions_lock:
+        if host not in sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, pool_block=False)
+            for prefix in "http://", "https://":
+                session.mount(prefix, adapter)
+            sessions[host] = session
+        return sessions[host]
+
+
+class PooledRequestsHTTPTransport(RequestsHTTPTransport):
+    # a Client connects and closes its transport around every execute; borrowing the host's
+    # shared session instead of opening a new one keeps connections alive between requests
+
+    def __init__(self, *args: Any, pool_maxsize: int, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.pool_maxsize = pool_maxsize
+
+    def connect(self) -> None:
+        self.session = get_session(self.url, self.pool_maxsize)
+
+    def close(self) -> None:
+        self.session = None
@@ -0,0 +1,209 @@
+from typing import Any, Dict, Iterator, List, Optional
+from decimal import Decimal
+import hashlib
+import json
+import os
+import shutil
+import threading
+import pandas as pd
+import pyarrow as pa
+from utils import dump_json, load_json
+
+
+# vejoe wars history is an append-only log split into one JSON-lines segment per block range,
+# so adding a point only touches the last segment and range reads skip unrelated segments
+VEJOE_WARS_DIR = "jsons/vejoe_wars"
+VEJOE_WARS_SEGMENT_BLOCKS = 100000
+
+FRAMES_DIR = "jsons"
+
+# name -> generation id of the data behind it, published by the collector whenever that data
+# changes; the dashboard keys its caches on these instead of hashing DataFrames
+GENERATIONS_PATH = "jsons/generations.json"
+generations_lock = threading.Lock()
+
+
+def get_block_number(block_data: Dict[str, Any]) -> int:
+    return block_data["Pool"]["block_number"]
+
+
+def get_segment_path(store_dir: str, segment_start_block_number: int) -> str:
+    return os.path.join(store_dir, f"segment_{segment_start_block_number:012d}.jsonl")
+
+
+def list_segments(store_dir: str) -> List[int]:
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(
+        int(file_name[len("segment_"):-len(".jsonl")])
+        for file_name in os.listdir(store_dir)
+        if file_name.startswith("segment_") and file_name.endswith(".jsonl")
+    )
+
+
+def append_vejoe_wars(block_datas: List[Dict[str, Any]], store_dir: str = VEJOE_WARS_DIR, is_published: bool = True) -> None:
+    os.makedirs(store_dir, exist_ok=True)
+
+    lines_by_segment: Dict[int, List[str]] = {}
+    for block_data in block_datas:
+        segment = get_block_number(block_data) // VEJOE_WARS_SEGMENT_BLOCKS * VEJOE_WARS_SEGMENT_BLOCKS
+        lines_by_segment.setdefault(segment, []).append(json.dumps(block_data))
+
+    for segment, lines in lines_by_segment.items():
+        path = get_segment_path(store_dir, segment)
+        with open(path, mode="a+b") as f:
+            # never glue a new line onto a line left half-written by a crash
+            prefix = b""
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    prefix = b"\n"
+            f.write(prefix + "".join(f"{line}\n" for line in lines).encode())
+
+    if is_published and len(block_datas) > 0:
+        last_block_number = max(get_block_number(block_data) for block_data in block_datas)
+        publish_generation(os.path.basename(os.path.normpath(store_dir)), str(last_block_number))
+
+
+def iter_segment(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, mode="r") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # a line cut short by a crash while appending
+                continue
+
+
+def load_vejoe_wars(
+    store_dir: str = VEJOE_WARS_DIR,
+    min_block_number: Optional[int] = None,
+    max_block_number: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    for segment in list_segments(store_dir):
+        if max_block_number is not None and segment > max_block_number:
+            break
+        if min_block_number is not None and segment + VEJOE_WARS_SEGMENT_BLOCKS <= min_block_number:
+            continue
+        for block_data in iter_segment(get_segment_path(store_dir, segment)):
+            block_number = get_block_number(block_data)
+            if min_block_number is not None and block_number < min_block_number:
+                continue
+            if max_block_number is not None and block_number > max_block_number:
+                continue
+            yield block_data
+
+
+def load_last_vejoe_wars(store_dir: str = VEJOE_WARS_DIR) -> Optional[Dict[str, Any]]:
+    segments = list_segments(store_dir)
+    for segment in reversed(segments):
+        with open(get_segment_path(store_dir, segment), mode="rb") as f:
+            f.seek(0, os.SEEK_END)
+            # read backwards until the buffer holds a complete, parseable line
+            position = f.tell()
+            buffer = b""
+            while position > 0:
+                read_size = min(1 << 14, position)
+                position -= read_size
+                f.seek(position)
+                buffer = f.read(read_size) + buffer
+                lines = buffer.split(b"\n")
+                # unless we reached the start of the file, the first line may be cut off
+                complete_lines = lines if position == 0 else lines[1:]
+                for line in reversed(complete_lines):
+                    try:
+                        return json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+    return None
+
+
+def get_old_store_dir(store_dir: str) -> str:
+    return f"{os.path.normpath(store_dir)}.old"
+
+
+def replace_vejoe_wars(new_store_dir: str, store_dir: str = VEJOE_WARS_DIR) -> None:
+    # swaps a fully written log in for `store_dir`; a crash between the two renames leaves the
+    # previous log at its ".old" path, where recover_vejoe_wars picks it up again
+    old_store_dir = get_old_store_dir(store_dir)
+    shutil.rmtree(old_store_dir, ignore_errors=True)
+    if os.path.isdir(store_dir):
+        os.replace(store_dir, old_store_dir)
+    os.replace(new_store_dir, store_dir)
+    shutil.rmtree(old_store_dir, ignore_errors=True)
+
+    last_block_data = load_last_vejoe_wars(store_dir)
+    if last_block_data is not None:
+        publish_generation(os.path.basename(os.path.normpath(store_dir)), str(get_block_number(last_block_data)))
+
+
+def recover_vejoe_wars(store_dir: str = VEJOE_WARS_DIR) -> None:
+    old_store_dir = get_old_store_dir(store_dir)
+    if not os.path.isdir(store_dir) and os.path.isdir(old_store_dir):
+        os.replace(old_store_dir, store_dir)
+
+
+def migrate_vejoe_wars_json(json_path: str, store_dir: str = VEJOE_WARS_DIR) -> None:
+    # one-off conversion of the old single-file history into the segmented log
+    if not os.path.exists(json_path) or len(list_segments(store_dir)) > 0:
+        return
+    with open(json_path, mode="r") as f:
+        block_datas = json.load(f)
+    append_vejoe_wars(block_datas, store_dir)
+    os.remove(json_path)
+
+
+def get_frame_path(name: str) -> str:
+    return os.path.join(FRAMES_DIR, f"{name}.arrow")
+
+
+def load_generations(path: str = GENERATIONS_PATH) -> Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    return load_json(path)
+
+
+def publish_generation(name: str, generation: str, path: str = GENERATIONS_PATH) -> bool:
+    # returns whether the data behind `name` changed since the last published generation
+    with generations_lock:
+        generations = load_generations(path)
+        if generations.get(name) == generation:
+            return False
+        generations[name] = generation
+        dump_json(generations, path)
+        return True
+
+
+def dump_frame(df: pd.DataFrame, name: str) -> bool:
+    # Arrow IPC files are uncompressed, so readers can memory-map them instead of parsing
+    df = df.copy()
+    for col in df.columns:
+        values = df[col].dropna()
+        if df[col].dtype == object and len(values) > 0 and isinstance(values.iloc[0], Decimal):
+            df[col] = df[col].astype(float)
+
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    buffer = sink.getvalue()
+
+    # the content digest is the generation id, so unchanged data keeps its generation
+    generation = hashlib.sha1(buffer).hexdigest()
+    if load_generations().get(name) == generation and os.path.exists(get_frame_path(name)):
+        return False
+
+    path = get_frame_path(name)
+    # unique per writer, so a collector and a dashboard writing the same frame never share it
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, mode="wb") as f:
+        f.write(buffer)
+    os.replace(tmp_path, path)
+    return publish_generation(name, generation)
+
+
+def load_frame(name: str) -> pd.DataFrame:
+    # the memory map stays alive for as long as the returned columns reference it
+    source = pa.memory_map(get_frame_path(name), mode="r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
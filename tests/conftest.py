@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the app is a set of top-level modules run from the repository root
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
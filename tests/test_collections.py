@@ -0,0 +1,29 @@
+from data_getter import COLLECTIONS, get_collection_fields, render_selection
+from views import VIEW_COLUMNS, is_view_column
+
+# frame columns that come from a collection's key fields rather than its column fields
+KEY_COLUMNS = {"vejoe_users_boosted_pools": ["pid"]}
+
+
+def test_render_selection_merges_paths() -> None:
+    paths = ["id", "rewards.rewardToken.symbol", "rewards.totalReward", "rewards.rewardToken.decimals"]
+    assert render_selection(paths) == "id rewards { rewardToken { symbol decimals } totalReward }"
+
+
+def test_collections_fetch_every_view_column() -> None:
+    for frame, view_columns in VIEW_COLUMNS.items():
+        fetched_columns = KEY_COLUMNS.get(frame, []) + [
+            column
+            for collection in COLLECTIONS.values()
+            if collection.frame == frame
+            for column in collection.column_fields
+        ]
+        assert [col for col in view_columns if col not in fetched_columns] == [], frame
+
+
+def test_collections_skip_columns_the_views_do_not_read() -> None:
+    fields = get_collection_fields("sjoe_users").split()
+    assert "totalStake" in fields and "rewards" in fields
+    assert "totalFee" not in fields and "depositCount" not in fields
+    assert not is_view_column("sJOE.deposit_count", VIEW_COLUMNS["sjoe_users"])
+    assert is_view_column("sJOE.total_rewards.USDC", VIEW_COLUMNS["sjoe_users"])
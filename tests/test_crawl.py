@@ -0,0 +1,123 @@
+from typing import Any, Dict, List, Optional
+import json
+import operator
+import random
+import threading
+
+import pytest
+
+import data_getter
+from data_getter import get_all_collection_rows, get_collection_range, get_page_size, get_shard_bounds
+
+NAME = "sjoe_users"
+ENTITY = data_getter.COLLECTIONS[NAME].entity
+# ids right on and around the shard boundaries of 4 shards, and at both ends of the id space
+EDGE_IDS = [
+    "0x" + prefix + filler * 38
+    for prefix in ["00", "3f", "40", "7f", "80", "bf", "c0", "ff"]
+    for filler in ["0", "f"]
+]
+
+
+OPERATORS = {"gt": operator.gt, "gte": operator.ge, "lt": operator.lt}
+
+
+class FakeSubgraph:
+    # answers collection queries from an in-memory table, the way graph-node applies `first` and
+    # the query's `where: { id_gt, id_gte, id_lt }` filters to rows ordered by id
+    def __init__(self, ids: List[str]) -> None:
+        self.rows = [{"id": id, "totalStake": "1", "rewards": []} for id in sorted(ids)]
+        self.page_sizes: List[int] = []
+        self.lock = threading.Lock()
+
+    def execute(self, query: Any, variable_values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        variables = variable_values or {}
+        selection = query.definitions[0].selection_set.selections[0]
+        conditions = [
+            (OPERATORS[field.name.value.split("_")[-1]], variables[field.value.name.value])
+            for argument in selection.arguments
+            if argument.name.value == "where"
+            for field in argument.value.fields
+        ]
+        rows = [row for row in self.rows if all(compare(row["id"], value) for compare, value in conditions)]
+        with self.lock:
+            self.page_sizes.append(variables["first"])
+        return {ENTITY: rows[:variables["first"]]}
+
+
+def make_ids(num_ids: int) -> List[str]:
+    generator = random.Random(0)
+    return [f"0x{generator.getrandbits(160):040x}" for _ in range(num_ids)] + EDGE_IDS
+
+
+@pytest.fixture
+def subgraph(monkeypatch: pytest.MonkeyPatch) -> FakeSubgraph:
+    subgraph = FakeSubgraph(make_ids(300))
+    monkeypatch.setattr(data_getter, "get_client", lambda url: subgraph)
+    monkeypatch.setattr(data_getter, "circuit_breakers", {})
+    monkeypatch.setattr(data_getter, "latencies", {})
+    monkeypatch.setattr(data_getter, "page_stats", {})
+    monkeypatch.setattr(data_getter, "collector_metrics", {})
+    # small pages, so every shard takes several
+    monkeypatch.setattr(data_getter, "MIN_PAGE_SIZE", 5)
+    monkeypatch.setattr(data_getter, "MAX_PAGE_SIZE", 20)
+    return subgraph
+
+
+@pytest.mark.parametrize("num_shards", [1, 3, 4])
+def test_shard_bounds_cover_the_id_space(num_shards: int) -> None:
+    bounds = get_shard_bounds(num_shards)
+    assert len(bounds) == num_shards
+    assert bounds[0][0] is None and bounds[-1][1] is None
+    for (_, upper), (lower, _) in zip(bounds, bounds[1:]):
+        assert upper == lower
+    prefixes = [lower for lower, _ in bounds[1:]]
+    assert prefixes == sorted(set(prefixes))
+
+    for id in EDGE_IDS:
+        matches = [
+            (lower, upper)
+            for lower, upper in bounds
+            if (lower is None or id >= lower) and (upper is None or id < upper)
+        ]
+        assert len(matches) == 1, id
+
+
+def test_sharded_crawl_matches_unsharded_crawl(subgraph: FakeSubgraph) -> None:
+    assert data_getter.COLLECTIONS[NAME].num_shards == 4
+    unsharded_rows, _ = get_collection_range(NAME)
+    sharded_rows = get_all_collection_rows(NAME)
+
+    assert sharded_rows == unsharded_rows == subgraph.rows
+    assert data_getter.collector_metrics["collections"][NAME]["num_shards"] == 4
+    ids = [row["id"] for row in sharded_rows]
+    assert "0x40" + "0" * 38 in ids and "0x3f" + "f" * 38 in ids
+
+
+@pytest.mark.parametrize("num_rows, num_requests", [(47, 5), (50, 6), (0, 1)])
+def test_short_page_ends_the_crawl(monkeypatch: pytest.MonkeyPatch, subgraph: FakeSubgraph, num_rows: int, num_requests: int) -> None:
+    monkeypatch.setattr(data_getter, "MIN_PAGE_SIZE", 10)
+    monkeypatch.setattr(data_getter, "MAX_PAGE_SIZE", 10)
+    subgraph.rows = subgraph.rows[:num_rows]
+    rows, num_pages = get_collection_range(NAME)
+    assert rows == subgraph.rows
+    assert num_pages == len(subgraph.page_sizes) == num_requests
+
+
+def test_page_size_follows_bytes_per_row(monkeypatch: pytest.MonkeyPatch, subgraph: FakeSubgraph) -> None:
+    row_bytes = len(json.dumps(subgraph.rows[0], separators=(",", ":")))
+    monkeypatch.setattr(data_getter, "TARGET_PAGE_BYTES", 8 * row_bytes)
+    rows, _ = get_collection_range(NAME)
+    assert rows == subgraph.rows
+    # the first page is sent before any row was seen, every later one fits the target (the
+    # estimate counts each row's share of the list separators too)
+    assert subgraph.page_sizes[0] == 20
+    assert len(set(subgraph.page_sizes[1:])) == 1
+    assert 7 <= subgraph.page_sizes[1] <= 8
+
+
+def test_page_size_stays_within_limits(subgraph: FakeSubgraph) -> None:
+    data_getter.record_page_stat(NAME, "seconds_per_row", data_getter.REQUEST_TIMEOUT_SECONDS)
+    assert get_page_size(NAME) == 5
+    data_getter.page_stats[NAME] = {"seconds_per_row": 1e-9, "bytes_per_row": 1.0}
+    assert get_page_size(NAME) == 20
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+import threading
+import time
+
+import pytest
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+import data_getter
+from data_getter import execute_query, parse_query
+
+URL = "https://example.com/subgraphs/name/test"
+QUERY = parse_query("query test { _meta { block { number } } }")
+
+
+class FakeClient:
+    def __init__(self, errors: List[Exception]) -> None:
+        self.errors = errors
+        self.num_calls = 0
+
+    def execute(self, query: Any, variable_values: Any = None) -> Dict[str, Any]:
+        self.num_calls += 1
+        if len(self.errors) > 0:
+            raise self.errors.pop(0)
+        return {"_meta": {"block": {"number": 1}}}
+
+
+@pytest.fixture(autouse=True)
+def endpoint_state(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(data_getter, "circuit_breakers", {})
+    monkeypatch.setattr(data_getter, "latencies", {})
+    monkeypatch.setattr(data_getter, "BACKOFF_BASE_SECONDS", 0.0)
+
+
+def test_query_errors_are_not_retried_nor_breaker_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = FakeClient([TransportQueryError("bad field")])
+    monkeypatch.setattr(data_getter, "get_client", lambda url: client)
+    with pytest.raises(TransportQueryError):
+        execute_query(URL, QUERY)
+    assert client.num_calls == 1
+    assert data_getter.circuit_breakers[URL]["failures"] == 0
+
+
+def test_transport_errors_are_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = FakeClient([TransportServerError("bad gateway", 502)])
+    monkeypatch.setattr(data_getter, "get_client", lambda url: client)
+    assert execute_query(URL, QUERY)["_meta"]["block"]["number"] == 1
+    assert client.num_calls == 2
+
+
+def test_half_open_breaker_lets_one_trial_through(monkeypatch: pytest.MonkeyPatch) -> None:
+    is_sent = threading.Event()
+    is_released = threading.Event()
+
+    class SlowClient(FakeClient):
+        def execute(self, query: Any, variable_values: Any = None) -> Dict[str, Any]:
+            is_sent.set()
+            is_released.wait(timeout=10)
+            return super().execute(query, variable_values)
+
+    client = SlowClient([])
+    monkeypatch.setattr(data_getter, "get_client", lambda url: client)
+    cooled_down_at = time.monotonic() - data_getter.CIRCUIT_BREAKER_COOLDOWN_SECONDS - 1
+    data_getter.circuit_breakers[URL] = {"failures": data_getter.CIRCUIT_BREAKER_FAILURES, "opened_at": cooled_down_at, "probing_since": None}
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        trial = executor.submit(execute_query, URL, QUERY)
+        assert is_sent.wait(timeout=10)
+        with pytest.raises(Exception, match="half-open"):
+            execute_query(URL, QUERY)
+        is_released.set()
+        assert trial.result()["_meta"]["block"]["number"] == 1
+
+    assert data_getter.circuit_breakers[URL]["opened_at"] is None
+    execute_query(URL, QUERY)
+    assert client.num_calls == 2
+
+
+def test_failed_trial_reopens_breaker(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = FakeClient([TransportServerError("bad gateway", 502)])
+    monkeypatch.setattr(data_getter, "get_client", lambda url: client)
+    cooled_down_at = time.monotonic() - data_getter.CIRCUIT_BREAKER_COOLDOWN_SECONDS - 1
+    data_getter.circuit_breakers[URL] = {"failures": data_getter.CIRCUIT_BREAKER_FAILURES, "opened_at": cooled_down_at, "probing_since": None}
+
+    with pytest.raises(Exception, match="is open"):
+        execute_query(URL, QUERY)
+    assert client.num_calls == 1
@@ -0,0 +1,146 @@
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, List, Optional, Set, Tuple
+import itertools
+
+import pytest
+
+import data_getter
+from data_getter import SCHEDULE_JITTER, SCHEDULER_TICK_SECONDS, SOURCE_SCHEDULES, run_scheduler
+
+SIMULATED_SECONDS = 2 * 60 * 60
+# far above what the ticks and source completions of SIMULATED_SECONDS need
+MAX_WAKEUPS = 10000
+
+
+class StopScheduler(Exception):
+    pass
+
+
+class FakeClock:
+    # stands in for the `time` module; every wakeup is recorded so spinning shows up as
+    # zero-second waits
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.timeouts: List[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    perf_counter = monotonic = time
+
+    def wake_up(self, timeout: float) -> None:
+        self.timeouts.append(timeout)
+        assert len(self.timeouts) < MAX_WAKEUPS, "the scheduler is spinning"
+        if self.now >= SIMULATED_SECONDS:
+            raise StopScheduler()
+
+    def sleep(self, seconds: float) -> None:
+        self.wake_up(seconds)
+        self.now += seconds
+
+
+class FakeSource:
+    def __init__(self, clock: FakeClock, duration: float, changes: Iterable[Optional[bool]]) -> None:
+        self.clock = clock
+        self.duration = duration
+        self.changes = iter(changes)
+        self.started_at: List[float] = []
+
+    def __call__(self) -> Optional[bool]:
+        self.started_at.append(self.clock.now)
+        return next(self.changes)
+
+
+class FakeExecutor:
+    # runs a source as soon as it is submitted and completes its future `duration` fake seconds later
+    def __init__(self, clock: FakeClock) -> None:
+        self.clock = clock
+        self.running: List[Tuple[float, Future, FakeSource]] = []
+
+    def __enter__(self) -> "FakeExecutor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def submit(self, fn: Callable, name: str, source: FakeSource, *args: Any) -> Future:
+        future: Future = Future()
+        _, is_changed = fn(name, source, *args)
+        future.is_changed = is_changed  # type: ignore[attr-defined]
+        self.running.append((self.clock.now + source.duration, future, source))
+        return future
+
+    def wait(self, futures: List[Future], timeout: float, return_when: str) -> Tuple[Set[Future], Set[Future]]:
+        self.clock.wake_up(timeout)
+        finishing = [done_at for done_at, future, _ in self.running if future in futures]
+        self.clock.now = max(self.clock.now, min(min(finishing, default=float("inf")), self.clock.now + timeout))
+        done = {future for done_at, future, _ in self.running if done_at <= self.clock.now}
+        for done_at, future, source in self.running:
+            if future in done:
+                future.set_result((source.duration, future.is_changed))  # type: ignore[attr-defined]
+        self.running = [entry for entry in self.running if entry[1] not in done]
+        return done, set(futures) - done
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    executor = FakeExecutor(clock)
+    monkeypatch.setattr(data_getter, "time", clock)
+    monkeypatch.setattr(data_getter, "ThreadPoolExecutor", lambda **kwargs: executor)
+    monkeypatch.setattr(data_getter, "wait", executor.wait)
+    monkeypatch.setattr(data_getter, "dump_json", lambda data, path: None)
+    monkeypatch.setattr(data_getter, "get_num_recent_requests", lambda: 0)
+    monkeypatch.setattr(data_getter, "collector_metrics", {})
+    return clock
+
+
+def run(sources: List[Tuple[str, FakeSource, str]]) -> None:
+    with pytest.raises(StopScheduler):
+        run_scheduler(sources)
+
+
+def test_source_held_back_by_a_busy_endpoint_does_not_spin(clock: FakeClock) -> None:
+    slow = FakeSource(clock, 20 * 60, itertools.repeat(True))
+    held_back = FakeSource(clock, 1, itertools.repeat(True))
+    run([("vejoe_users", slow, "endpoint"), ("vejoe_wars", held_back, "endpoint")])
+
+    assert min(clock.timeouts) > 0
+    assert len(clock.timeouts) <= 2 * SIMULATED_SECONDS / SCHEDULER_TICK_SECONDS
+    # vejoe_wars goes first on priority and holds the slow source back for a second; then it is
+    # held back itself and runs as soon as the slow source frees the endpoint
+    assert held_back.started_at[0] == 0 and slow.started_at[0] == held_back.duration
+    assert held_back.started_at[1] == slow.started_at[0] + slow.duration
+
+
+def test_source_held_back_by_the_request_budget_does_not_spin(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> None:
+    monkeypatch.setattr(data_getter, "get_num_recent_requests", lambda: data_getter.REQUEST_BUDGET_PER_MINUTE)
+    low_priority = FakeSource(clock, 1, itertools.repeat(True))
+    high_priority = FakeSource(clock, 1, itertools.repeat(True))
+    run([("vejoe_users", low_priority, "users_endpoint"), ("vejoe_wars", high_priority, "wars_endpoint")])
+
+    assert min(clock.timeouts) > 0
+    assert len(clock.timeouts) <= 2 * SIMULATED_SECONDS / SCHEDULER_TICK_SECONDS
+    assert low_priority.started_at == []
+    assert len(high_priority.started_at) >= SIMULATED_SECONDS / SOURCE_SCHEDULES["vejoe_wars"].max_interval_seconds
+
+
+@pytest.mark.parametrize("is_changed", [True, False, None])
+def test_intervals_stay_within_the_schedule(clock: FakeClock, is_changed: Optional[bool]) -> None:
+    sources = {
+        name: FakeSource(clock, 0, itertools.repeat(is_changed))
+        for name in ["vejoe_wars", "vejoe_users", "vejoe_day_snapshots"]
+    }
+    run([(name, source, name) for name, source in sources.items()])
+
+    for name, source in sources.items():
+        schedule = SOURCE_SCHEDULES[name]
+        assert source.started_at[0] == 0
+        interval_seconds = schedule.interval_seconds
+        for previous_start, start in zip(source.started_at, source.started_at[1:]):
+            if is_changed is False:
+                # unchanged data backs off, up to the source's max interval
+                interval_seconds = min(schedule.max_interval_seconds, interval_seconds * 2)
+            gap = start - previous_start
+            assert interval_seconds * (1 - SCHEDULE_JITTER) - 1e-6 <= gap <= interval_seconds * (1 + SCHEDULE_JITTER) + 1e-6, name
+        assert interval_seconds <= schedule.max_interval_seconds
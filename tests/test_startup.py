@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+from conftest import REPO_DIR
+
+# imported on the first query or the first dashboard render, never by importing the collector
+LAZY_MODULES = ["gql", "graphql", "pooled_transport", "altair", "itables", "streamlit"]
+# generous: numpy, pandas and pyarrow make up most of the roughly one second it takes
+MAX_IMPORT_SECONDS = 10.0
+
+IMPORT_COLLECTOR = """
+import json
+import sys
+import time
+started_at = time.perf_counter()
+import collector
+import data_getter
+print(json.dumps({
+    "import_seconds": time.perf_counter() - started_at,
+    "modules": sorted(sys.modules),
+    "num_clients": len(getattr(data_getter.thread_local, "clients", {})),
+    "num_parsed_queries": data_getter.parse_query.cache_info().currsize,
+}))
+"""
+
+
+def test_collector_import_is_lazy() -> None:
+    # a fresh interpreter, so modules imported by other tests do not count
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_COLLECTOR],
+        cwd=REPO_DIR,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    assert [module for module in LAZY_MODULES if module in result["modules"]] == []
+    assert result["num_clients"] == 0
+    assert result["num_parsed_queries"] == 0
+    assert result["import_seconds"] < MAX_IMPORT_SECONDS
@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable, List
+import threading
+import time
+
+import pytest
+
+import utils
+from utils import stale_while_revalidate
+
+MAX_STALENESS = 60.0
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(utils, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(utils, "swr_entries", {})
+    return clock
+
+
+def wait_until(condition: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def wait_for_rebuilds() -> None:
+    wait_until(lambda: not any(thread.name.startswith("rebuild ") for thread in threading.enumerate()))
+
+
+def is_rebuilding() -> bool:
+    with utils.swr_lock:
+        return any(entry["rebuilding"] for entries in utils.swr_entries.values() for entry in entries.values())
+
+
+def test_serves_stale_value_while_rebuilding() -> None:
+    is_released = threading.Event()
+
+    @stale_while_revalidate(max_staleness=MAX_STALENESS)
+    def build(generation: str) -> str:
+        if generation != "1":
+            assert is_released.wait(timeout=10)
+        return f"value {generation}"
+
+    assert build("1") == "value 1"
+    assert build("2") == "value 1"
+    assert is_rebuilding()
+    assert build("2") == "value 1"
+    is_released.set()
+    wait_for_rebuilds()
+    assert build("2") == "value 2"
+
+
+def test_rebuilds_once_for_concurrent_callers() -> None:
+    built: List[str] = []
+    is_released = threading.Event()
+
+    @stale_while_revalidate(max_staleness=MAX_STALENESS)
+    def build(generation: str) -> str:
+        built.append(generation)
+        if generation != "1":
+            assert is_released.wait(timeout=10)
+        return f"value {generation}"
+
+    build("1")
+    barrier = threading.Barrier(8)
+
+    def call() -> str:
+        barrier.wait()
+        return build("2")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        values = list(executor.map(lambda _: call(), range(8)))
+    assert values == ["value 1"] * 8
+    is_released.set()
+    wait_for_rebuilds()
+    assert built == ["1", "2"]
+
+
+def test_rebuilds_synchronously_past_max_staleness(clock: FakeClock) -> None:
+    is_released = threading.Event()
+
+    @stale_while_revalidate(max_staleness=MAX_STALENESS)
+    def build(generation: str) -> str:
+        if generation == "2":
+            assert is_released.wait(timeout=10)
+        return f"value {generation}"
+
+    build("1")
+    assert build("2") == "value 1"
+    clock.now += MAX_STALENESS / 2
+    assert build("2") == "value 1"
+    clock.now += MAX_STALENESS
+    assert build("3") == "value 3"
+
+    # the overtaken background rebuild does not replace the newer value
+    is_released.set()
+    wait_for_rebuilds()
+    assert build("3") == "value 3"
+
+
+def test_failed_rebuild_keeps_the_entry() -> None:
+    failures = ["2"]
+
+    @stale_while_revalidate(max_staleness=MAX_STALENESS)
+    def build(generation: str) -> str:
+        if generation in failures:
+            failures.remove(generation)
+            raise ValueError("subgraph down")
+        return f"value {generation}"
+
+    build("1")
+    assert build("2") == "value 1"
+    wait_for_rebuilds()
+    assert build("2") == "value 1"
+    wait_for_rebuilds()
+    assert build("2") == "value 2"
@@ -0,0 +1,97 @@
+from typing import Any, Dict, List
+from decimal import Decimal
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from data_getter import JOE_DECIMALS, JOE_PER_SEC, to_vejoe_users_boosted_pools_df, to_vejoe_users_df, vejoe_wars_rewards
+from utils import load_json
+
+JSONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jsons")
+
+FLOAT_COLUMNS = [
+    "JOE Stake",
+    "veJOE Balance",
+    "Daily JOE Reward",
+    "JOE Stake Percentage",
+    "veJOE Balance Percentage",
+    "Daily JOE Reward Percentage",
+]
+
+# two stakes that differ by about 2e-14 JOE: the reference ranks them as a tie, vejoe_wars_rewards
+# does not, so the second of them and every stake ranked after them (all zero stakes) are one lower
+NEAR_TIE_ADDRESSES = ["0xc1672e08c48a04534ceb1c6198f8717a4e678f30", "0xae2f31e450ea235faa99fea4c9a644a01a8de2a8"]
+
+
+def vejoe_wars_decimal(vejoe_users: List[Dict[str, Any]], vejoe_users_boosted_pools: Any) -> pd.DataFrame:
+    # exact Decimal reference implementation of vejoe_wars_rewards
+    joe_per_sec = Decimal(JOE_PER_SEC) / Decimal("10") ** JOE_DECIMALS
+    num_secs_in_day = Decimal(60 * 60 * 24)
+    df_vejoe_users_boosted_pools = to_vejoe_users_boosted_pools_df(vejoe_users_boosted_pools, exact=True)
+    df_vejoe_users = to_vejoe_users_df(vejoe_users, exact=True)
+    df = df_vejoe_users_boosted_pools.join(df_vejoe_users, how="outer")
+    df["user_factor"] = (df["veJOE.veJOE_balance"] * df["user_lp_amount"]).fillna(Decimal("0")) ** (Decimal("0.5"))
+    df["total_factor"] = df["user_factor"].groupby(df["pid"]).transform("sum")
+    df["user_factor_ratio"] = df["user_factor"] / df["total_factor"]
+    df["user_lp_ratio"] = df["user_lp_amount"] / df["total_lp_amount"]
+    df["total_alloc_point"] = df.drop_duplicates(subset=["pid"])["alloc_point"].sum()
+    df["boost_joe_per_sec"] = joe_per_sec * (df["alloc_point"] / df["total_alloc_point"]) * (df["veJOE_share_bp"] / Decimal("10000")) * df["user_factor_ratio"]
+    df["base_joe_per_sec"] = joe_per_sec * (df["alloc_point"] / df["total_alloc_point"]) * ((Decimal("10000") - df["veJOE_share_bp"]) / Decimal("10000")) * df["user_lp_ratio"]
+    df["pool_joe_per_sec"] = (df["base_joe_per_sec"] + df["boost_joe_per_sec"])
+    df["user_joe_per_sec"] = df["pool_joe_per_sec"].groupby(df.index).transform("sum")
+    df["user_joe_per_day"] = df["user_joe_per_sec"] * num_secs_in_day
+    df.reset_index(inplace=True)
+    df.drop_duplicates("address", inplace=True)
+    df = df[["address", "veJOE.total_JOE_stake", "veJOE.veJOE_balance", "user_joe_per_day"]].fillna(Decimal("0"))
+    df.rename(columns={"veJOE.total_JOE_stake": "JOE Stake", "veJOE.veJOE_balance": "veJOE Balance", "user_joe_per_day": "Daily JOE Reward"}, inplace=True)
+    df["JOE Stake Rank"] = df["JOE Stake"].rank(method="min", ascending=False)
+    df["veJOE Balance Rank"] = df["veJOE Balance"].rank(method="min", ascending=False)
+    df["Daily JOE Reward Rank"] = df["Daily JOE Reward"].rank(method="min", ascending=False)
+    df["JOE Stake Percentage"] = df["JOE Stake"] / df["JOE Stake"].sum()
+    df["veJOE Balance Percentage"] = df["veJOE Balance"] / df["veJOE Balance"].sum()
+    df["Daily JOE Reward Percentage"] = df["Daily JOE Reward"] / df["Daily JOE Reward"].sum()
+    return df
+
+
+@pytest.fixture(scope="module")
+def vejoe_wars() -> Dict[str, pd.DataFrame]:
+    vejoe_users = load_json(os.path.join(JSONS_DIR, "vejoe_get_all_users.json"))
+    vejoe_users_boosted_pools = load_json(os.path.join(JSONS_DIR, "vejoe_get_all_users_boosted_pool_positions.json"))
+    df = vejoe_wars_rewards(to_vejoe_users_boosted_pools_df(vejoe_users_boosted_pools), to_vejoe_users_df(vejoe_users))
+    df_reference = vejoe_wars_decimal(vejoe_users, vejoe_users_boosted_pools)
+    return {
+        "rewards": df.set_index("address"),
+        "reference": df_reference.set_index("address").sort_index(),
+    }
+
+
+def test_same_addresses(vejoe_wars: Dict[str, pd.DataFrame]) -> None:
+    assert vejoe_wars["rewards"].index.equals(vejoe_wars["reference"].index)
+
+
+@pytest.mark.parametrize("col", FLOAT_COLUMNS)
+def test_values_match_reference(vejoe_wars: Dict[str, pd.DataFrame], col: str) -> None:
+    np.testing.assert_allclose(
+        vejoe_wars["rewards"][col].to_numpy(),
+        vejoe_wars["reference"][col].astype(float).to_numpy(),
+        rtol=1e-9,
+        atol=0,
+    )
+
+
+@pytest.mark.parametrize("col", ["veJOE Balance Rank", "Daily JOE Reward Rank"])
+def test_ranks_match_reference(vejoe_wars: Dict[str, pd.DataFrame], col: str) -> None:
+    np.testing.assert_array_equal(vejoe_wars["rewards"][col].to_numpy(), vejoe_wars["reference"][col].to_numpy())
+
+
+def test_stake_ranks_differ_only_after_near_tie(vejoe_wars: Dict[str, pd.DataFrame]) -> None:
+    ranks = vejoe_wars["rewards"]["JOE Stake Rank"]
+    reference_ranks = vejoe_wars["reference"]["JOE Stake Rank"]
+
+    assert reference_ranks[NEAR_TIE_ADDRESSES].nunique() == 1
+    assert ranks[NEAR_TIE_ADDRESSES].tolist() == [reference_ranks[NEAR_TIE_ADDRESSES[0]], reference_ranks[NEAR_TIE_ADDRESSES[0]] + 1]
+
+    is_different = ranks.to_numpy() != reference_ranks.to_numpy()
+    is_expected = (vejoe_wars["rewards"]["JOE Stake"] == 0).to_numpy() | (ranks.index == NEAR_TIE_ADDRESSES[1])
+    np.testing.assert_array_equal(is_different, is_expected)
+    assert ((ranks - reference_ranks)[is_different] == 1).all()
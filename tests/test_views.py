@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from views import format_datatable, format_numbers, paginate, query_datatable
+
+
+def make_datatable() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "JOE Stake": [1.5, 2.0, np.nan],
+            "JOE Stake Percentage": [0.25, 0.75, np.nan],
+            "JOE Stake Rank": [2, 1, 3],
+        },
+        index=pd.Index(["0xaa", "0xbb", "0xcc"], name="address"),
+    )
+
+
+def test_format_numbers() -> None:
+    assert format_numbers(np.array([1.5, 2.0, 0.1234, np.nan])).tolist() == ["1.5", "2", "0.123", ""]
+
+
+def test_format_numbers_empty() -> None:
+    assert format_numbers(np.array([], dtype=np.float64)).tolist() == []
+
+
+def test_format_datatable() -> None:
+    formatted = format_datatable(make_datatable())
+    assert formatted["JOE Stake"].tolist() == ["1.5", "2", ""]
+    assert formatted["JOE Stake Percentage"].tolist() == ["25.000%", "75.000%", ""]
+    assert formatted["JOE Stake Rank"].tolist() == [2, 1, 3]
+
+
+def test_format_empty_page() -> None:
+    # a search without matches leaves an empty page to format
+    page = paginate(query_datatable(make_datatable(), search="0xzz"), page=1, page_size=10)
+    formatted = format_datatable(page)
+    assert len(formatted) == 0
+    assert formatted.columns.equals(page.columns)
@@ -1,5 +1,9 @@
-from typing import Any
+from typing import Any, Callable, Dict, Tuple
+import functools
 import json
+import os
+import threading
+import time
 
 
 def load_json(path: str) -> Any:
@@ -9,5 +13,84 @@ def load_json(path: str) -> Any:
 
 
 def dump_json(data: Any, path: str) -> None:
-    with open(path, mode="w") as f:
+    # write to a temporary file and swap it in, so readers never see a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode="w") as f:
         json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+# function -> arguments -> last built value; kept in an imported module so it survives
+# Streamlit re-executing the script that defines the cached functions
+swr_entries: Dict[str, Dict[Tuple, Dict[str, Any]]] = {}
+swr_lock = threading.Lock()
+
+
+def stale_while_revalidate(max_staleness: float) -> Callable:
+    # caches functions whose first argument is a data generation id. When the generation moves
+    # on, the last built value keeps being served while a background thread rebuilds it, unless
+    # it has been stale for more than `max_staleness` seconds, in which case the caller rebuilds.
+    def decorator(func: Callable) -> Callable:
+        func_key = f"{func.__module__}.{func.__qualname__}"
+
+        def store(key: Tuple, generation: str, value: Any) -> None:
+            with swr_lock:
+                entries = swr_entries.setdefault(func_key, {})
+                entry = entries.get(key)
+                # a background rebuild finishing after a caller already built the latest
+                # generation must not replace it
+                if entry is not None and entry["generation"] == entry["latest_generation"] != generation:
+                    return
+                # a rebuild overtaken by a newer generation is stale from the start, so it keeps
+                # the clock of the value it replaces
+                stale_since = None
+                if entry is not None and entry["latest_generation"] != generation:
+                    stale_since = entry["stale_since"]
+                entries[key] = {
+                    "generation": generation,
+                    "latest_generation": generation if entry is None else entry["latest_generation"],
+                    "value": value,
+                    "stale_since": stale_since,
+                    "rebuilding": False,
+                }
+
+        def rebuild(key: Tuple, generation: str, args: Tuple, kwargs: Dict[str, Any]) -> None:
+            try:
+                value = func(generation, *args, **kwargs)
+            except Exception as e:
+                print(f"rebuilding {func_key} for generation {generation} failed: {e!r}")
+                with swr_lock:
+                    swr_entries[func_key][key]["rebuilding"] = False
+                return
+            store(key, generation, value)
+
+        @functools.wraps(func)
+        def wrapper(generation: str, *args: Any, **kwargs: Any) -> Any:
+            key = (args, tuple(sorted(kwargs.items())))
+            with swr_lock:
+                entry = swr_entries.get(func_key, {}).get(key)
+                if entry is not None and entry["generation"] == generation:
+                    return entry["value"]
+                if entry is not None:
+                    now = time.monotonic()
+                    entry["latest_generation"] = generation
+                    if entry["stale_since"] is None:
+                        entry["stale_since"] = now
+                    if now - entry["stale_since"] <= max_staleness:
+                        if not entry["rebuilding"]:
+                            entry["rebuilding"] = True
+                            threading.Thread(
+                                target=rebuild,
+                                args=(key, generation, args, kwargs),
+                                name=f"rebuild {func_key}",
+                                daemon=True,
+                            ).start()
+                        return entry["value"]
+
+            value = func(generation, *args, **kwargs)
+            store(key, generation, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,293 @@
+from typing import Any, Dict, List, Literal, Optional, Tuple
+import itertools
+import os
+import threading
+import numpy as np
+import pandas as pd
+from data_getter import VEJOE_WARS_PLATFORMS, publish_missing_frames, vejoe_wars_rewards
+from storage import dump_frame, get_frame_path, load_frame, load_generations, publish_generation
+
+
+# columns (or column prefixes, for the per-token reward columns) of each normalized frame that
+# the views read; the collector fetches only the subgraph fields behind them (see
+# data_getter.COLLECTIONS), and frames converted from older, fuller syncs are cut down to them
+VIEW_COLUMNS: Dict[str, List[str]] = {
+    "vejoe_users": ["veJOE.total_JOE_stake", "veJOE.veJOE_balance"],
+    "sjoe_users": ["sJOE.total_JOE_stake", "sJOE.total_rewards"],
+    "rjoe_users": ["rJOE.total_JOE_stake"],
+    "vejoe_users_boosted_pools": ["lp_token", "pid", "veJOE_share_bp", "alloc_point", "total_lp_amount", "user_lp_amount"],
+    "vejoe_day_snapshots": [
+        "veJOE.total_JOE_stake",
+        "veJOE.total_veJOE_reward",
+        "veJOE.change_JOE_stake",
+        "veJOE.change_veJOE_reward",
+        "veJOE.total_user_count",
+        "veJOE.active_user_count",
+    ],
+    "sjoe_day_snapshots": [
+        "sJOE.total_JOE_stake",
+        "sJOE.total_JOE_fee",
+        "sJOE.change_JOE_stake",
+        "sJOE.change_JOE_fee",
+        "sJOE.total_user_count",
+        "sJOE.active_user_count",
+        "sJOE.total_rewards",
+        "sJOE.change_in_rewards",
+    ],
+    "rjoe_day_snapshots": [
+        "rJOE.total_JOE_stake",
+        "rJOE.change_JOE_stake",
+        "rJOE.total_user_count",
+        "rJOE.active_user_count",
+    ],
+}
+
+# frames behind each pool checkbox, in veJOE, sJOE, rJOE order
+USERS_FRAMES = ["vejoe_users", "sjoe_users", "rjoe_users"]
+DAY_SNAPSHOTS_FRAMES = ["vejoe_day_snapshots", "sjoe_day_snapshots", "rjoe_day_snapshots"]
+VEJOE_WARS_FRAMES = ["vejoe_users_boosted_pools", "vejoe_users"]
+
+# generations published once the views built from each group of frames are written
+VIEWS_INPUTS = ["users_view_inputs", "day_snapshots_view_inputs", "vejoe_wars_view_inputs"]
+
+# publish_views runs on the collector thread and on the first dashboard run of the process
+views_lock = threading.Lock()
+views_prepared = threading.Event()
+
+# every non-empty combination of the pool checkboxes
+POOL_CHOICES: List[Tuple[bool, ...]] = [
+    choices
+    for choices in itertools.product([True, False], repeat=3)
+    if any(choices)
+]
+
+FROM_ADDRESS_TO_PLATFORM = {address: platform for platform, address in VEJOE_WARS_PLATFORMS.items()}
+
+
+def get_view_name(kind: str, choices: Tuple[bool, ...]) -> str:
+    return f"{kind}_view_{''.join('1' if choice else '0' for choice in choices)}"
+
+
+def is_view_column(col: str, view_columns: List[str]) -> bool:
+    return any(col == view_col or col.startswith(f"{view_col}.") for view_col in view_columns)
+
+
+def load_view_frame(name: str) -> pd.DataFrame:
+    df = load_frame(name)
+    return df[[col for col in df.columns if is_view_column(col, VIEW_COLUMNS[name])]]
+
+
+def join_multiple_dfs(dfs: List[pd.DataFrame], how: Literal["left", "right", "inner", "outer",]) -> pd.DataFrame:
+    assert len(dfs) >= 2, "pass at least 2 DataFrames"
+    df = dfs.pop(0).copy()
+    while True:
+        df_other = dfs.pop(0).copy()
+        df = df.join(df_other, how=how)
+        if len(dfs) == 0:
+            break
+    return df
+
+
+def make_datatable(
+    dfs: List[pd.DataFrame],
+    choices: List[bool],
+) -> pd.DataFrame:
+    assert len(dfs) == len(choices), "`dfs` and `choices` must have the same length"
+    dfs_c = [
+        df
+        for df, choice in zip(dfs, choices)
+        if choice
+    ]
+
+    if len(dfs_c) == 0:
+        return pd.DataFrame()
+    elif len(dfs_c) == 1:
+        df_dashboard = dfs_c[0]
+    else:
+        df_dashboard = join_multiple_dfs(dfs_c, how="outer")
+
+    # views stay numeric so they sort by value; format_datatable formats the rows on display
+    return df_dashboard
+
+
+def make_users_datatable(
+    dfs: List[pd.DataFrame],
+    choices: List[bool],
+) -> pd.DataFrame:
+    # columns stay flat "pool.stats" names; the dashboard splits them into a MultiIndex
+    datatable = make_datatable(dfs, choices).copy()
+    datatable.fillna(0, inplace=True)
+    return datatable
+
+
+def make_day_snapshots_datatable(
+    dfs: List[pd.DataFrame],
+    choices: List[bool],
+) -> pd.DataFrame:
+    datatable = make_datatable(dfs, choices).copy()
+    datatable.reset_index(inplace=True)
+    return datatable
+
+
+def make_vejoe_wars_datatable(df_vejoe_users_boosted_pools: pd.DataFrame, df_vejoe_users: pd.DataFrame) -> pd.DataFrame:
+    datatable = vejoe_wars_rewards(df_vejoe_users_boosted_pools, df_vejoe_users)
+    datatable["address"] = datatable["address"].map(lambda x: FROM_ADDRESS_TO_PLATFORM.get(x, x))
+    datatable.set_index("address", inplace=True)
+    return datatable
+
+
+def get_inputs_generation(frame_names: List[str]) -> Optional[str]:
+    generations = load_generations()
+    if any(name not in generations for name in frame_names):
+        return None
+    return "|".join(generations[name] for name in frame_names)
+
+
+def is_view_current(inputs_name: str, inputs_generation: str, view_names: List[str]) -> bool:
+    generations = load_generations()
+    return generations.get(inputs_name) == inputs_generation and all(os.path.exists(get_frame_path(name)) for name in view_names)
+
+
+def publish_views() -> None:
+    # post-fetch stage of the collector: materializes every table the dashboard shows, once per
+    # data refresh, and only for views whose input frames changed. The inputs generation is
+    # published last, so the dashboard never keys its cache on a view that is still being written.
+    with views_lock:
+        inputs_generation = get_inputs_generation(USERS_FRAMES)
+        view_names = [get_view_name("users", choices) for choices in POOL_CHOICES]
+        if inputs_generation is not None and not is_view_current("users_view_inputs", inputs_generation, view_names):
+            dfs = [load_view_frame(name) for name in USERS_FRAMES]
+            for choices, view_name in zip(POOL_CHOICES, view_names):
+                dump_frame(make_users_datatable(list(dfs), list(choices)), view_name)
+            publish_generation("users_view_inputs", inputs_generation)
+
+        inputs_generation = get_inputs_generation(DAY_SNAPSHOTS_FRAMES)
+        view_names = [get_view_name("day_snapshots", choices) for choices in POOL_CHOICES]
+        if inputs_generation is not None and not is_view_current("day_snapshots_view_inputs", inputs_generation, view_names):
+            dfs = [load_view_frame(name) for name in DAY_SNAPSHOTS_FRAMES]
+            for choices, view_name in zip(POOL_CHOICES, view_names):
+                dump_frame(make_day_snapshots_datatable(list(dfs), list(choices)), view_name)
+            publish_generation("day_snapshots_view_inputs", inputs_generation)
+
+        inputs_generation = get_inputs_generation(VEJOE_WARS_FRAMES)
+        if inputs_generation is not None and not is_view_current("vejoe_wars_view_inputs", inputs_generation, ["vejoe_wars_view"]):
+            dfs = [load_view_frame(name) for name in VEJOE_WARS_FRAMES]
+            dump_frame(make_vejoe_wars_datatable(*dfs), "vejoe_wars_view")
+            publish_generation("vejoe_wars_view_inputs", inputs_generation)
+
+
+def prepare_views() -> None:
+    # frames and views from the committed JSON, for a dashboard started before any collector has
+    # published; runs once per process
+    if views_prepared.is_set():
+        return
+    publish_missing_frames()
+    publish_views()
+    views_prepared.set()
+
+
+def is_views_ready() -> bool:
+    generations = load_generations()
+    return all(name in generations for name in VIEWS_INPUTS + ["vejoe_wars_view"])
+
+
+def get_sort_key(values: pd.Series) -> pd.Series:
+    # text sorts case-insensitively, numbers by value
+    if values.dtype == object:
+        return values.str.lower()
+    return values
+
+
+def format_numbers(values: np.ndarray, fmt: str = "%.3f") -> np.ndarray:
+    # vectorized f"{x:.3f}".rstrip("0").rstrip("."), with NaN shown as an empty cell
+    values = values.astype(np.float64)
+    if len(values) == 0:
+        # np.char.mod returns the empty float array unchanged
+        return values.astype(str)
+    formatted = np.char.rstrip(np.char.rstrip(np.char.mod(fmt, values), "0"), ".")
+    formatted[np.isnan(values)] = ""
+    return formatted
+
+
+def format_datatable(df: pd.DataFrame) -> pd.DataFrame:
+    # meant for the handful of rows on screen; columns named "... Percentage" hold shares of 1
+    formatted = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        name = col[-1] if isinstance(col, tuple) else col
+        if values.dtype.kind == "f" and str(name).endswith("Percentage"):
+            formatted[col] = np.where(np.isnan(values), "", np.char.mod("%.3f%%", values * 100).astype(str))
+        elif values.dtype.kind == "f":
+            formatted[col] = format_numbers(values)
+        else:
+            formatted[col] = values
+    return pd.DataFrame(formatted, index=df.index, columns=df.columns)
+
+
+def query_datatable(
+    df: pd.DataFrame,
+    sort_by: Optional[Any] = None,
+    ascending: bool = True,
+    search: str = "",
+) -> pd.DataFrame:
+    # `search` matches the index (address or platform), `sort_by=None` sorts by the index
+    if search != "":
+        df = df[df.index.astype(str).str.contains(search, case=False, regex=False)]
+    if sort_by is None:
+        return df.sort_index(ascending=ascending, key=get_sort_key)
+    return df.sort_values(sort_by, ascending=ascending, key=get_sort_key, na_position="last")
+
+
+def get_num_pages(num_rows: int, page_size: int) -> int:
+    return max(1, -(-num_rows // page_size))
+
+
+def paginate(df: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
+    # `page` counts from 1 and is clamped to the last page
+    page = min(max(page, 1), get_num_pages(len(df), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def downsample_min_max(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    num_buckets: int,
+    group: Optional[str] = None,
+) -> pd.DataFrame:
+    # splits the x range into `num_buckets` buckets and keeps the first, last, lowest and highest
+    # point of each bucket (per group), so lines keep their shape and peaks at a bounded size
+    num_groups = 1 if group is None else max(df[group].nunique(), 1)
+    if len(df) <= 4 * num_buckets * num_groups:
+        return df
+
+    df = df.reset_index(drop=True)
+    xs = df[x].to_numpy()
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = xs.astype("datetime64[ns]").astype(np.int64)
+    xs = xs.astype(np.float64)
+    x_min, x_max = np.nanmin(xs), np.nanmax(xs)
+    span = x_max - x_min if x_max > x_min else 1.0
+    buckets = np.clip(((xs - x_min) / span * num_buckets).astype(np.int64), 0, num_buckets - 1)
+
+    if group is not None:
+        buckets = pd.factorize(df[group])[0] * num_buckets + buckets
+
+    ys = df[y].to_numpy(dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(ys))
+    keep = np.concatenate([
+        get_bucket_ends(np.lexsort((xs, buckets)), buckets),
+        get_bucket_ends(valid[np.lexsort((ys[valid], buckets[valid]))], buckets),
+    ])
+    return df.iloc[np.unique(keep)]
+
+
+def get_bucket_ends(order: np.ndarray, buckets: np.ndarray) -> np.ndarray:
+    # first and last row of every bucket, given rows ordered by bucket
+    if len(order) == 0:
+        return order
+    sorted_buckets = buckets[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    return np.concatenate([order[starts], order[ends]])